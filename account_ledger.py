@@ -0,0 +1,196 @@
+"""
+Append-only columnar transaction ledger.
+
+Instead of one Python object per transaction, the ledger keeps three parallel
+columns: epoch timestamps and signed amounts as doubles, and a small integer
+type code per entry. Appends must come in time order, which keeps the
+timestamp column sorted:
+
+- date-range queries are two binary searches over the timestamp column;
+- a checkpoint of the running balance is stored every `checkpoint_every`
+  entries, so the balance at any instant is one binary search plus the sum of
+  at most `checkpoint_every` amounts;
+- `archive(directory)` moves the in-memory entries into an on-disk segment
+  file which is memory-mapped back, so old history is paged in by the OS only
+  when a query touches it. Segment names get a unique suffix, so any number
+  of ledgers can archive into the same directory.
+
+Segment file layout: an 8 byte magic, the entry count as uint64, then the
+timestamp column (float64), the amount column (float64) and the type column
+(int8), in native byte order.
+"""
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+import time
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+SEGMENT_MAGIC = b"LEDGER01"
+_HEADER = struct.Struct("=8sQ")
+
+Entry = Tuple[float, float, int]  # (timestamp, signed amount, type code)
+
+
+class Segment:
+    """ Read-only, memory-mapped block of ledger entries. """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self._mmap)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not a ledger segment")
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        self.timestamps = view[offset:offset + 8 * count].cast("d")
+        offset += 8 * count
+        self.amounts = view[offset:offset + 8 * count].cast("d")
+        offset += 8 * count
+        self.types = view[offset:offset + count].cast("b")
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @staticmethod
+    def write(path: str, timestamps: array, amounts: array, types: array) -> "Segment":
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(SEGMENT_MAGIC, len(timestamps)))
+            f.write(timestamps.tobytes())
+            f.write(amounts.tobytes())
+            f.write(types.tobytes())
+        return Segment(path)
+
+    def close(self):
+        self.timestamps.release()
+        self.amounts.release()
+        self.types.release()
+        self._mmap.close()
+
+
+class Ledger:
+
+    def __init__(self, opening_balance: float = 0.0, checkpoint_every: int = 256):
+        self.opening_balance = opening_balance
+        self.balance = opening_balance
+        self.checkpoint_every = checkpoint_every
+        self.segments: List[Segment] = []
+        self.segment_starts: List[int] = []  # global index of each segment's first entry
+        self.archived = 0
+        self.timestamps = array("d")
+        self.amounts = array("d")
+        self.types = array("b")
+        # checkpoints[i] is the balance after the first (i + 1) * checkpoint_every entries.
+        self.checkpoints = array("d")
+
+    def __len__(self):
+        return self.archived + len(self.timestamps)
+
+    def append(self, amount: float, type_code: int, timestamp: Optional[float] = None) -> None:
+        """
+        :param amount: Signed change to the balance.
+        :param type_code: Caller defined transaction type, -128..127.
+        :param timestamp: Epoch seconds, defaults to now. Never earlier than the last entry.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        last = self._last_timestamp()
+        if last is not None and timestamp < last:
+            timestamp = last
+        self.timestamps.append(timestamp)
+        self.amounts.append(amount)
+        self.types.append(type_code)
+        self.balance += amount
+        if len(self) % self.checkpoint_every == 0:
+            self.checkpoints.append(self.balance)
+
+    def _last_timestamp(self) -> Optional[float]:
+        if self.timestamps:
+            return self.timestamps[-1]
+        if self.segments:
+            return self.segments[-1].timestamps[-1]
+        return None
+
+    # Index helpers over the archived segments followed by the in-memory tail.
+
+    def _locate(self, index: int):
+        if index >= self.archived:
+            return self.timestamps, self.amounts, self.types, index - self.archived
+        s = bisect.bisect_right(self.segment_starts, index) - 1
+        segment = self.segments[s]
+        return segment.timestamps, segment.amounts, segment.types, index - self.segment_starts[s]
+
+    def entry(self, index: int) -> Entry:
+        timestamps, amounts, types, i = self._locate(index)
+        return timestamps[i], amounts[i], types[i]
+
+    def _columns(self):
+        for start, segment in zip(self.segment_starts, self.segments):
+            yield start, segment.timestamps, segment.amounts, segment.types
+        yield self.archived, self.timestamps, self.amounts, self.types
+
+    def _bisect(self, timestamp: float, right: bool) -> int:
+        """ Number of entries before (or, with `right`, at or before) `timestamp`. """
+        search = bisect.bisect_right if right else bisect.bisect_left
+        for start, timestamps, _, _ in self._columns():
+            if timestamps and (timestamps[-1] > timestamp if right else timestamps[-1] >= timestamp):
+                return start + search(timestamps, timestamp)
+        return len(self)
+
+    def _sum(self, start: int, end: int) -> float:
+        total = 0.0
+        for column_start, _, amounts, _ in self._columns():
+            lo = max(start, column_start) - column_start
+            hi = min(end, column_start + len(amounts)) - column_start
+            if lo < hi:
+                total += sum(amounts[lo:hi])
+        return total
+
+    # Queries
+
+    def entries(self, start: int = 0, end: Optional[int] = None) -> Iterator[Entry]:
+        end = len(self) if end is None else end
+        for column_start, timestamps, amounts, types in self._columns():
+            lo = max(start, column_start) - column_start
+            hi = min(end, column_start + len(timestamps)) - column_start
+            for i in range(lo, hi):
+                yield timestamps[i], amounts[i], types[i]
+
+    def between(self, since: float, until: float) -> Iterator[Entry]:
+        """ Entries with since <= timestamp < until, found in O(log n). """
+        return self.entries(self._bisect(since, right=False), self._bisect(until, right=False))
+
+    def balance_at(self, timestamp: float) -> float:
+        """ Balance after every entry at or before `timestamp`. """
+        count = self._bisect(timestamp, right=True)
+        checkpoint = count // self.checkpoint_every
+        if checkpoint:
+            return self.checkpoints[checkpoint - 1] + self._sum(checkpoint * self.checkpoint_every, count)
+        return self.opening_balance + self._sum(0, count)
+
+    # Storage
+
+    def archive(self, directory: str) -> Optional[Segment]:
+        """ Moves the in-memory entries to a new memory-mapped segment file. """
+        if not self.timestamps:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        # Created exclusively under a fresh name: a segment that is already
+        # mapped, by this ledger or another one, is never truncated.
+        fd, path = tempfile.mkstemp(prefix=f"segment-{self.archived:012d}-", suffix=".ledger", dir=directory)
+        os.close(fd)
+        segment = Segment.write(path, self.timestamps, self.amounts, self.types)
+        self.segments.append(segment)
+        self.segment_starts.append(self.archived)
+        self.archived += len(segment)
+        self.timestamps = array("d")
+        self.amounts = array("d")
+        self.types = array("b")
+        return segment
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
@@ -30,7 +30,9 @@ Maybe we can combine both in the user component only
 """
 import datetime
 from enum import Enum
-from typing import Optional
+from typing import Iterator, Optional
+
+from account_ledger import Ledger
 
 
 class Card:
@@ -48,29 +50,38 @@ class TransactionType(Enum):
     Debit = "Debit"
 
 
+TRANSACTION_CODES = {TransactionType.Credit: 0, TransactionType.Debit: 1}
+TRANSACTION_TYPES = {code: txn_type for txn_type, code in TRANSACTION_CODES.items()}
+
+
 class Transaction:
-    def __init__(self, amount: float, transaction_type: TransactionType):
+    def __init__(self, amount: float, transaction_type: TransactionType, dt: Optional[datetime.datetime] = None):
         self.amount = amount
         self.txn_type = transaction_type
-        self.dt = datetime.datetime.now()
+        self.dt = dt or datetime.datetime.now()
 
     def __str__(self) -> str:
         return f"{self.dt} - {self.txn_type} - {self.amount}"
 
 
 class Account:
+    """
+    History is kept in a columnar Ledger rather than a list of Transaction
+    objects; Transactions are only built when history is read.
+    """
+
     def __init__(self, balance: float):
         self.balance = balance
-        self.transactions = []
+        self.ledger = Ledger(balance)
 
     def deposit(self, amount):
-        self.transactions.append(Transaction(amount, TransactionType.Credit))
+        self.ledger.append(amount, TRANSACTION_CODES[TransactionType.Credit])
         self.update_balance(amount)
 
     def withdraw(self, amount) -> (int, bool):
         if amount <= self.balance:
-            self.update_balance(amount)
-            self.transactions.append(Transaction(amount, TransactionType.Debit))
+            self.update_balance(-amount)
+            self.ledger.append(-amount, TRANSACTION_CODES[TransactionType.Debit])
             return amount, True
         else:
             print("Insufficient Balance")
@@ -82,8 +93,26 @@ class Account:
     def get_balance(self):
         return self.balance
 
-    def get_transactions(self) -> list:
-        return self.transactions
+    @staticmethod
+    def _to_transaction(entry) -> Transaction:
+        timestamp, amount, code = entry
+        return Transaction(abs(amount), TRANSACTION_TYPES[code], datetime.datetime.fromtimestamp(timestamp))
+
+    def get_transactions(self, since: Optional[datetime.datetime] = None,
+                         until: Optional[datetime.datetime] = None) -> Iterator[Transaction]:
+        if since is None and until is None:
+            entries = self.ledger.entries()
+        else:
+            entries = self.ledger.between(since.timestamp() if since else float("-inf"),
+                                          until.timestamp() if until else float("inf"))
+        return map(self._to_transaction, entries)
+
+    def balance_at(self, dt: datetime.datetime) -> float:
+        return self.ledger.balance_at(dt.timestamp())
+
+    def archive_history(self, directory: str) -> None:
+        """ Moves the history recorded so far to a memory-mapped file in `directory`. """
+        self.ledger.archive(directory)
 
 
 class Cash:
@@ -174,7 +203,7 @@ class ATM:
 
     def deposit(self):
         cash = self.user.deposit_money()
-        self.user.account.update_balance(cash.amount)
+        self.user.account.deposit(cash.amount)
         self.update_available_cash(cash.amount)
         self.return_card()
 
@@ -184,10 +213,9 @@ class ATM:
 
     def withdraw(self):
         amount = self.user.withdraw_money()
-        if self.is_amount_valid(amount):
+        if self.is_amount_valid(amount) and self.user.account.withdraw(amount)[1]:
             print("Dispensing cash...")
             cash = Cash(amount)
-            self.user.account.update_balance(-amount)
             print("Please collect your cash")
             self.update_available_cash(-amount)
             return cash
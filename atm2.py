@@ -17,8 +17,15 @@ Since ATM class functions as a finite-state machine, we can incorporate
 the State design pattern.
 """
 import datetime
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Optional
+from typing import Dict, Iterator, Optional
+
+from account_ledger import Ledger
 
 
 class Card:
@@ -36,29 +43,63 @@ class TransactionType(Enum):
     Debit = "Debit"
 
 
+TRANSACTION_CODES = {TransactionType.Credit: 0, TransactionType.Debit: 1}
+TRANSACTION_TYPES = {code: txn_type for txn_type, code in TRANSACTION_CODES.items()}
+
+
 class Transaction:
-    def __init__(self, amount: float, transaction_type: TransactionType):
+    def __init__(self, amount: float, transaction_type: TransactionType, dt: Optional[datetime.datetime] = None):
         self.amount = amount
         self.txn_type = transaction_type
-        self.dt = datetime.datetime.now()
+        self.dt = dt or datetime.datetime.now()
 
     def __str__(self) -> str:
         return f"{self.dt} - {self.txn_type} - {self.amount}"
 
 
 class Account:
+    """
+    History is kept in a columnar Ledger rather than a list of Transaction
+    objects; Transactions are only built when history is read.
+
+    Deposits and withdrawals hold the account lock, so several ATMs can serve
+    the same account at once; `contended` counts how often a caller found the
+    lock taken and had to wait.
+    """
+
     def __init__(self, balance: float):
         self.balance = balance
-        self.transactions = []
+        self.ledger = Ledger(balance)
+        self.lock = threading.Lock()
+        self.contended = 0
+
+    def _acquire(self):
+        if not self.lock.acquire(blocking=False):
+            self.lock.acquire()
+            self.contended += 1
 
     def deposit(self, amount):
-        self.transactions.append(Transaction(amount, TransactionType.Credit))
-        self.update_balance(amount)
+        self._acquire()
+        try:
+            self.ledger.append(amount, TRANSACTION_CODES[TransactionType.Credit])
+            self.update_balance(amount)
+        finally:
+            self.lock.release()
+
+    def try_withdraw(self, amount) -> bool:
+        """ Atomically checks the balance and debits the account. """
+        self._acquire()
+        try:
+            if amount > self.balance:
+                return False
+            self.update_balance(-amount)
+            self.ledger.append(-amount, TRANSACTION_CODES[TransactionType.Debit])
+            return True
+        finally:
+            self.lock.release()
 
     def withdraw(self, amount) -> (int, bool):
-        if amount <= self.balance:
-            self.update_balance(amount)
-            self.transactions.append(Transaction(amount, TransactionType.Debit))
+        if self.try_withdraw(amount):
             return amount, True
         else:
             print("Insufficient Balance")
@@ -70,8 +111,26 @@ class Account:
     def get_balance(self):
         return self.balance
 
-    def get_transactions(self) -> list:
-        return self.transactions
+    @staticmethod
+    def _to_transaction(entry) -> Transaction:
+        timestamp, amount, code = entry
+        return Transaction(abs(amount), TRANSACTION_TYPES[code], datetime.datetime.fromtimestamp(timestamp))
+
+    def get_transactions(self, since: Optional[datetime.datetime] = None,
+                         until: Optional[datetime.datetime] = None) -> Iterator[Transaction]:
+        if since is None and until is None:
+            entries = self.ledger.entries()
+        else:
+            entries = self.ledger.between(since.timestamp() if since else float("-inf"),
+                                          until.timestamp() if until else float("inf"))
+        return map(self._to_transaction, entries)
+
+    def balance_at(self, dt: datetime.datetime) -> float:
+        return self.ledger.balance_at(dt.timestamp())
+
+    def archive_history(self, directory: str) -> None:
+        """ Moves the history recorded so far to a memory-mapped file in `directory`. """
+        self.ledger.archive(directory)
 
 
 class Cash:
@@ -162,7 +221,7 @@ class ATM:
 
     def deposit(self):
         cash = self.user.deposit_money()
-        self.user.account.update_balance(cash.amount)
+        self.user.account.deposit(cash.amount)
         self.update_available_cash(cash.amount)
         self.return_card()
 
@@ -172,10 +231,9 @@ class ATM:
 
     def withdraw(self):
         amount = self.user.withdraw_money()
-        if self.is_amount_valid(amount):
+        if self.is_amount_valid(amount) and self.user.account.withdraw(amount)[1]:
             print("Dispensing cash...")
             cash = Cash(amount)
-            self.user.account.update_balance(-amount)
             print("Please collect your cash")
             self.update_available_cash(-amount)
             return cash
@@ -197,3 +255,194 @@ class ATM:
 
     def update_available_cash(self, amount: float):
         self.available_cash += amount
+
+
+class CashCassette:
+    """ Notes loaded in one ATM, by denomination. """
+
+    def __init__(self, notes: Dict[int, int]):
+        self.notes = dict(notes)
+        self.lock = threading.Lock()
+
+    def total(self) -> int:
+        return sum(denomination * count for denomination, count in self.notes.items())
+
+    def _plan(self, amount: int) -> Optional[Dict[int, int]]:
+        """
+        Fewest notes adding up to `amount` within the loaded counts, None if no
+        combination does. Largest-first fails on cases like 600 from 500 x 1 and
+        200 x 3, so this is a bounded change-making DP over amount / gcd of the
+        denominations, with each note count split into bundles of 1, 2, 4, ...
+        notes so a denomination costs O(log count) passes.
+        """
+        denominations = [denomination for denomination, count in self.notes.items() if count > 0]
+        unit = math.gcd(*denominations) if denominations else 1
+        if amount % unit or amount > self.total():
+            return None
+        target = amount // unit
+        bundles = []
+        for denomination in denominations:
+            count, size = self.notes[denomination], 1
+            while count:
+                bundle = min(size, count)
+                bundles.append((denomination, bundle))
+                count -= bundle
+                size *= 2
+
+        fewest = [0] + [math.inf] * target
+        used = []  # per bundle, the amounts whose best combination took it
+        for denomination, bundle in bundles:
+            step = denomination // unit * bundle
+            took = bytearray(target + 1)
+            for value in range(target, step - 1, -1):
+                notes = fewest[value - step] + bundle
+                if notes < fewest[value]:
+                    fewest[value] = notes
+                    took[value] = 1
+            used.append(took)
+        if fewest[target] == math.inf:
+            return None
+
+        picked: Dict[int, int] = {}
+        value = target
+        for (denomination, bundle), took in zip(reversed(bundles), reversed(used)):
+            if took[value]:
+                picked[denomination] = picked.get(denomination, 0) + bundle
+                value -= denomination // unit * bundle
+        return picked
+
+    def take(self, amount: int) -> Optional[Dict[int, int]]:
+        """ Removes the fewest notes adding up to `amount`; None if no combination of loaded notes does. """
+        with self.lock:
+            picked = self._plan(amount)
+            if picked is None:
+                return None
+            for denomination, count in picked.items():
+                self.notes[denomination] -= count
+            return picked
+
+    def put(self, notes: Dict[int, int]):
+        with self.lock:
+            for denomination, count in notes.items():
+                self.notes[denomination] = self.notes.get(denomination, 0) + count
+
+
+class Bank:
+    """ Accounts shared by every ATM of the bank. """
+
+    def __init__(self):
+        self.accounts: Dict[int, Account] = {}
+        self.cards: Dict[int, Card] = {}
+        self.card_accounts: Dict[int, int] = {}
+
+    def open_account(self, account_id: int, card: Card, balance: float = 0.0) -> Account:
+        account = Account(balance)
+        self.accounts[account_id] = account
+        self.cards[card.card_number] = card
+        self.card_accounts[card.card_number] = account_id
+        return account
+
+    def authenticate(self, card_number: int, pin: int) -> Optional[Account]:
+        card = self.cards.get(card_number)
+        if card and card.authenticate(pin):
+            return self.accounts[self.card_accounts[card_number]]
+        return None
+
+    def contention(self) -> int:
+        return sum(account.contended for account in self.accounts.values())
+
+
+class BankATM:
+    """
+    Non-interactive ATM backed by a shared Bank, so any number of them can run
+    sessions in parallel threads.
+
+    A withdrawal first takes the notes out of this ATM's cassette and then
+    debits the account; if the debit fails the notes go back. Money is
+    therefore never dispensed without a matching debit, and an account is
+    never debited for cash the ATM cannot give.
+    """
+
+    def __init__(self, atm_id: int, bank: Bank, cassette: CashCassette):
+        self.atm_id = atm_id
+        self.bank = bank
+        self.cassette = cassette
+        self.dispensed = 0
+        self.deposited = 0
+        self.failed = 0
+        self._stats_lock = threading.Lock()
+
+    def withdraw(self, card_number: int, pin: int, amount: int) -> Optional[Dict[int, int]]:
+        account = self.bank.authenticate(card_number, pin)
+        notes = self.cassette.take(amount) if account and amount > 0 else None
+        if notes is not None and not account.try_withdraw(amount):
+            self.cassette.put(notes)
+            notes = None
+        with self._stats_lock:
+            if notes is None:
+                self.failed += 1
+            else:
+                self.dispensed += amount
+        return notes
+
+    def deposit(self, card_number: int, pin: int, notes: Dict[int, int]) -> bool:
+        account = self.bank.authenticate(card_number, pin)
+        if not account:
+            return False
+        amount = sum(denomination * count for denomination, count in notes.items())
+        self.cassette.put(notes)
+        account.deposit(amount)
+        with self._stats_lock:
+            self.deposited += amount
+        return True
+
+    def balance(self, card_number: int, pin: int) -> Optional[float]:
+        account = self.bank.authenticate(card_number, pin)
+        return account.get_balance() if account else None
+
+
+def simulate_load(atms: int = 8, accounts: int = 50, sessions: int = 20000, threads: int = 16, seed: int = 0):
+    """
+    Runs random deposit/withdraw/balance sessions from a thread pool across
+    `atms` ATMs sharing `accounts` accounts, then reports throughput, lock
+    contention and checks that no money was created or lost.
+    """
+    rng = random.Random(seed)
+    bank = Bank()
+    for account_id in range(accounts):
+        bank.open_account(account_id, Card(account_id, datetime.date(2030, 1, 1), 1000 + account_id), 5000)
+    machines = [BankATM(i, bank, CashCassette({2000: 50, 500: 200, 100: 500})) for i in range(atms)]
+    balances = sum(account.balance for account in bank.accounts.values())
+    cash = sum(m.cassette.total() for m in machines)
+
+    plan = [(rng.choice(machines), rng.randrange(accounts), rng.random(), rng.choice([100, 500, 1200, 2500]))
+            for _ in range(sessions)]
+
+    def session(step):
+        machine, account_id, roll, amount = step
+        pin = 1000 + account_id
+        if roll < 0.6:
+            machine.withdraw(account_id, pin, amount)
+        elif roll < 0.8:
+            machine.deposit(account_id, pin, {100: amount // 100})
+        else:
+            machine.balance(account_id, pin)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(session, plan))
+    elapsed = time.perf_counter() - started
+
+    # Dispensed cash left both an account and a cassette, deposited cash entered both.
+    net = sum(m.deposited - m.dispensed for m in machines)
+    conserved = (sum(account.balance for account in bank.accounts.values()) == balances + net and
+                 sum(m.cassette.total() for m in machines) == cash + net)
+    print(f"{sessions} sessions on {atms} ATMs / {threads} threads in {elapsed:.2f}s: "
+          f"{sessions / elapsed:,.0f} txn/s")
+    print(f"contended account locks: {bank.contention()}, "
+          f"failed withdrawals: {sum(m.failed for m in machines)}, "
+          f"money conserved: {conserved}")
+
+
+if __name__ == "__main__":
+    simulate_load()
@@ -86,11 +86,16 @@ Expectations
 ● Don’t use any databases.
 """
 
+import argparse
 import datetime
 import heapq
+import itertools
+import sys
 import time
 from enum import Enum
-from typing import List, Dict, Union
+from typing import Callable, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from data_strutures.indexable_skip_list import IndexableSkipList
 
 
 class Order(Enum):
@@ -98,6 +103,16 @@ class Order(Enum):
     Descending = 1
 
 
+class WinningRule(Enum):
+    Lowest = 0  # lowest bid, earliest submission breaks ties
+    LowestUnique = 1  # lowest bid that no other bid matched
+
+
+# Tiebreaker for equal bids. next() on a shared count is atomic, unlike
+# time.time_ns(), which can hand two threads the same value.
+_bid_sequence = itertools.count()
+
+
 class Event:
     _id_generator = None
 
@@ -114,14 +129,49 @@ class Event:
             yield i
             i += 1
 
-    def __init__(self, name: str, prize: str, date: str):
-        self.id = Event.get_id()
+    def __init__(self, name: str, prize: str, date: str, rule: WinningRule = WinningRule.Lowest,
+                 id_: Optional[int] = None):
+        self.id = Event.get_id() if id_ is None else id_
         self.name = name
         self.prize = prize
         self.date = datetime.datetime.fromisoformat(date)
+        self.rule = rule
         self.winners = []
+        # Winning amount as of the declaration; later bids do not change it.
+        self.winning_amount: Optional[int] = None
         self.participants = set()
-        self.bids = []
+        self.bid_count = 0
+        # Winner is maintained as bids come in instead of storing every bid.
+        # Lowest: the smallest (bid, sequence, member_id) seen so far.
+        self.best_bid: Optional[Tuple[int, int, int]] = None
+        # LowestUnique: how often each amount was bid, the first bid of every
+        # amount, and a min-heap of amounts that were unique when pushed.
+        # Counts only grow, so an amount that stops being unique never
+        # becomes unique again and is dropped lazily from the heap.
+        self.bid_amount_counts: Dict[int, int] = {}
+        self.first_bids: Dict[int, Tuple[int, int, int]] = {}
+        self.unique_amounts: List[int] = []
+
+    def place_bid(self, member_id: int, bid: int):
+        entry = (bid, next(_bid_sequence), member_id)
+        self.bid_count += 1
+        if self.rule is WinningRule.Lowest:
+            if self.best_bid is None or entry < self.best_bid:
+                self.best_bid = entry
+            return
+        count = self.bid_amount_counts.get(bid, 0) + 1
+        self.bid_amount_counts[bid] = count
+        if count == 1:
+            self.first_bids[bid] = entry
+            heapq.heappush(self.unique_amounts, bid)
+
+    def winning_bid(self) -> Optional[Tuple[int, int, int]]:
+        """ (bid, sequence, member_id) of the current winner, None without a valid bid. """
+        if self.rule is WinningRule.Lowest:
+            return self.best_bid
+        while self.unique_amounts and self.bid_amount_counts[self.unique_amounts[0]] > 1:
+            heapq.heappop(self.unique_amounts)
+        return self.first_bids[self.unique_amounts[0]] if self.unique_amounts else None
 
     def __str__(self):
         return f"{self.id}: {self.name}"
@@ -143,8 +193,8 @@ class Member:
             yield i
             i += 1
 
-    def __init__(self, name: str, coins: int):
-        self.id = Member.get_id()
+    def __init__(self, name: str, coins: int, id_: Optional[int] = None):
+        self.id = Member.get_id() if id_ is None else id_
         self.name = name
         self.coins = coins
         self.events = set()
@@ -173,6 +223,9 @@ class System:
     _instance = None
     members: Dict[int, Member] = {}
     events: Dict[int, Event] = {}
+    # Events with a declared winner keyed by (date, event id), kept sorted as
+    # winners are declared so listing never has to re-sort.
+    winners_by_date = IndexableSkipList()
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -186,13 +239,19 @@ class System:
         return self.members.get(member_id)
 
     def add_members(self, member: Member):
-        self.members[member.id] = member
+        self._add_member(member)
         print(f"{member.name} added successfully")
 
+    def _add_member(self, member: Member):
+        self.members[member.id] = member
+
     def add_event(self, event: Event):
-        self.events[event.id] = event
+        self._add_event(event)
         print(f"{event.name} added successfully")
 
+    def _add_event(self, event: Event):
+        self.events[event.id] = event
+
     def register_member(self, member_id: int, event_id: int):
         if member_id in self.members and event_id in self.events:
             self.events[event_id].participants.add(member_id)
@@ -200,29 +259,194 @@ class System:
     def place_bid(self, member_id: int, event_id: int, bids: List[int]) -> bool:
         if member_id in self.members:
             if event_id in self.events:
+                event = self.events[event_id]
                 for bid in bids:
-                    self.events[event_id].bids.append((bid, time.time_ns(), member_id))
+                    event.place_bid(member_id, bid)
                 return True
         return False
 
-    def declare_winner(self, event_id: int) -> str:
-        bids = self.events[event_id].bids.copy()
-        heapq.heapify(bids)
-        winning_bid = heapq.heappop(bids)
+    def declare_winner(self, event_id: int) -> Optional[str]:
+        event = self.events[event_id]
+        winning_bid = event.winning_bid()
+        if winning_bid is None:
+            return None
         winner = self.get_member(winning_bid[2])
-        self.events[event_id].winners.append(winner)
+        event.winners.append(winner)
+        event.winning_amount = winning_bid[0]
+        self.winners_by_date.insert((event.date, event.id), event)
         return winner.name
 
-    def list_winners(self, event_id: int, order: Order = Order.Ascending) -> List[str]:
-        all_winners = self.events[event_id].winners
-        if order == order.Descending:
-            all_winners.sort(reverse=True)
-        else:
-            all_winners.sort()
-        return [winner.name for winner in all_winners[:5]]
-
-
-if __name__ == "__main__":
+    def list_winners(self, order: Order = Order.Ascending, limit: int = 5, offset: int = 0) -> List[dict]:
+        """
+        Winners of past events ordered by event date, `limit` at a time starting
+        `offset` events from the oldest (or newest, for Descending) one.
+        O(log n + limit) on the date index.
+        """
+        page = self.winners_by_date.page(offset, limit, reverse=order is Order.Descending)
+        return [
+            {
+                "event_id": event.id,
+                "winner_name": event.winners[0].name,
+                "lowest_bid": event.winning_amount,
+                "date": event.date.date(),
+            }
+            for _, event in page
+        ]
+
+
+class CommandError(Exception):
+    pass
+
+
+class CommandProcessor:
+    """
+    Runs the text command protocol from the problem statement against System.
+
+    Commands are read lazily, one line at a time, and dispatched through a
+    table of handlers. Each handler returns its output line instead of
+    printing it, and output is written in batches of `flush_every` lines, so
+    replaying tens of millions of commands is not dominated by per-line I/O.
+    Invalid commands produce an error line and do not stop the replay.
+    """
+
+    def __init__(self, system: System = None, out: TextIO = None, flush_every: int = 10000):
+        self.system = system or System()
+        self.out = out or sys.stdout
+        self.flush_every = flush_every
+        self.handlers: Dict[str, Callable[[List[str]], str]] = {
+            "ADD_MEMBER": self.add_member,
+            "ADD_EVENT": self.add_event,
+            "REGISTER_MEMBER": self.register_member,
+            "SUBMIT_BID": self.submit_bid,
+            "DECLARE_WINNER": self.declare_winner,
+            "LIST_WINNERS": self.list_winners,
+        }
+        self.event_names = {event.name for event in self.system.events.values()}
+        self.event_dates = {event.date.date() for event in self.system.events.values()}
+        self.counts: Dict[str, int] = dict.fromkeys(self.handlers, 0)
+        self.elapsed: Dict[str, float] = dict.fromkeys(self.handlers, 0.0)
+
+    def run(self, lines: Iterable[str]) -> None:
+        handlers, counts, elapsed = self.handlers, self.counts, self.elapsed
+        clock = time.perf_counter
+        buffer = []
+        for line in lines:
+            args = line.split()
+            if not args:
+                continue
+            command = args[0]
+            handler = handlers.get(command)
+            started = clock()
+            if handler is None:
+                buffer.append(f"Unknown command {command}")
+            else:
+                try:
+                    buffer.append(handler(args))
+                except CommandError as e:
+                    buffer.append(str(e))
+                except (ValueError, IndexError):
+                    buffer.append(f"Invalid arguments for {command}")
+                counts[command] += 1
+                elapsed[command] += clock() - started
+            if len(buffer) >= self.flush_every:
+                self.out.write("\n".join(buffer) + "\n")
+                buffer.clear()
+        if buffer:
+            self.out.write("\n".join(buffer) + "\n")
+        self.out.flush()
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            command: {
+                "count": count,
+                "seconds": self.elapsed[command],
+                "per_second": count / self.elapsed[command] if self.elapsed[command] else 0.0,
+            }
+            for command, count in self.counts.items() if count
+        }
+
+    def _member(self, member_id: str) -> Member:
+        member = self.system.get_member(int(member_id))
+        if member is None:
+            raise CommandError(f"Member {member_id} does not exist")
+        return member
+
+    def _event(self, event_id: str) -> Event:
+        event = self.system.get_event(int(event_id))
+        if event is None:
+            raise CommandError(f"Event {event_id} does not exist")
+        return event
+
+    def add_member(self, args: List[str]) -> str:
+        _, member_id, name, coins = args
+        if int(coins) <= 0:
+            raise CommandError("Super coins should be greater than zero")
+        if int(member_id) in self.system.members:
+            raise CommandError(f"Member {member_id} already exists")
+        self.system._add_member(Member(name.capitalize(), int(coins), int(member_id)))
+        return f"{name.capitalize()} added successfully"
+
+    def add_event(self, args: List[str]) -> str:
+        _, event_id, name, prize, date = args
+        event = Event(name, prize, date, id_=int(event_id))
+        if event.id in self.system.events or name in self.event_names:
+            raise CommandError(f"Event {name} already exists")
+        if event.date.date() in self.event_dates:
+            raise CommandError(f"An event is already scheduled on {date}")
+        self.system._add_event(event)
+        self.event_names.add(name)
+        self.event_dates.add(event.date.date())
+        return f"{name} with prize {prize} added successfully"
+
+    def register_member(self, args: List[str]) -> str:
+        _, member_id, event_id = args
+        member, event = self._member(member_id), self._event(event_id)
+        if event.id in member.events:
+            raise CommandError(f"{member.name} is already registered to the {event.name} event")
+        self.system.register_member(member.id, event.id)
+        member.events.add(event.id)
+        return f"{member.name} registered to the {event.name} event successfully"
+
+    def submit_bid(self, args: List[str]) -> str:
+        member, event = self.system.get_member(int(args[1])), self._event(args[2])
+        bids = [int(bid) for bid in args[3:]]
+        if member is None or event.id not in member.events:
+            raise CommandError("Member did not registered for this event")
+        if event.winners:
+            raise CommandError(f"Winner of {event.name} is already declared")
+        if not bids or len(bids) > 5:
+            raise CommandError("Between 1 and 5 bids can be submitted")
+        if len(set(bids)) != len(bids):
+            raise CommandError("Bids should be unique")
+        if min(bids) <= 0:
+            raise CommandError("Bids should be greater than zero")
+        highest = max(bids)
+        if member.coins < highest:
+            raise CommandError("Insufficient super coins to place the bids")
+        member.coins -= highest
+        self.system.place_bid(member.id, event.id, bids)
+        return "BIDS submitted successfully"
+
+    def declare_winner(self, args: List[str]) -> str:
+        event = self._event(args[1])
+        if event.winners:
+            raise CommandError(f"Winner of {event.name} is already declared")
+        winner = self.system.declare_winner(event.id)
+        if winner is None:
+            raise CommandError(f"No valid bids for {event.name}")
+        return f"{winner} wins the {event.prize} with lowest bid {event.winning_amount}"
+
+    def list_winners(self, args: List[str]) -> str:
+        order = Order.Descending if len(args) > 1 and args[1].lower() == "desc" else Order.Ascending
+        offset = int(args[2]) if len(args) > 2 else 0
+        rows = [
+            f"{{{row['event_id']}, {row['winner_name']}, {row['lowest_bid']}, {row['date']}}}"
+            for row in self.system.list_winners(order, offset=offset)
+        ]
+        return f"[ {', '.join(rows)} ]"
+
+
+def demo():
     # Create a system instance
     system = System()
 
@@ -250,13 +474,47 @@ if __name__ == "__main__":
     member1.submit_bid(event1.id, [500, 600, 700, 800, 900])
     member2.submit_bid(event1.id, [400, 550, 750, 850, 950])
 
+    member1.register(event2.id)
+    member1.submit_bid(event2.id, [50, 60])
+
     # Declare winners
     winner = system.declare_winner(event1.id)
     print("Winner of Event 1:", winner)  # Output: Alice
+    winner = system.declare_winner(event2.id)
+    print("Winner of Event 2:", winner)  # Output: John
 
     # List winners
-    winners = system.list_winners(event1.id, Order.Ascending)
-    print("Winners of Event 1 (Ascending):", winners)  # Output: ['Alice', 'John']
+    winners = system.list_winners(Order.Ascending)
+    print("Past winners (Ascending):", [row["winner_name"] for row in winners])  # Output: ['Alice', 'John']
+
+    winners_desc = system.list_winners(Order.Descending)
+    print("Past winners (Descending):", [row["winner_name"] for row in winners_desc])  # Output: ['John', 'Alice']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a BidBlitz command file.")
+    parser.add_argument("path", nargs="?", help="command file; runs the demo when omitted")
+    parser.add_argument("--output", help="write output to this file instead of stdout")
+    parser.add_argument("--stats", action="store_true", help="report per-command throughput on stderr")
+    args = parser.parse_args(argv)
+
+    if not args.path:
+        demo()
+        return
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        processor = CommandProcessor(out=out)
+        with open(args.path) as f:
+            processor.run(f)
+    finally:
+        if args.output:
+            out.close()
+    if args.stats:
+        for command, stats in processor.stats().items():
+            print(f"{command:<16} {stats['count']:>10,} in {stats['seconds']:>7.3f}s "
+                  f"{stats['per_second']:>12,.0f}/s", file=sys.stderr)
 
-    winners_desc = system.list_winners(event1.id, Order.Descending)
-    print("Winners of Event 1 (Descending):", winners_desc)  # Output: ['John', 'Alice']
+
+if __name__ == "__main__":
+    main()
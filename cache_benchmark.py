@@ -0,0 +1,190 @@
+"""
+Trace-driven benchmark for the cache implementations in this repo.
+
+Each trace is a sequence of keys. Replaying it does `get(key)` and, on a miss,
+`put(key, key)`, the usual read-through pattern. For every policy and capacity
+we report throughput, per-operation latency percentiles, hit ratio and peak
+memory allocated by the cache during the replay.
+
+Usage:
+    python cache_benchmark.py
+    python cache_benchmark.py --capacities 100 1000 --length 100000 --json results.json
+    python cache_benchmark.py --trace-file keys.txt --policies lru w-tinylfu
+
+Trace files hold one key per line; blank lines and lines starting with `#` are
+skipped, and keys that look like integers are read as ints.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from lfu_cache import CompactLFUCache, LFUCache
+from lru_cache import LRUCache, ShardedLRUCache
+from tiny_lfu_cache import WTinyLFUCache
+
+POLICIES: Dict[str, Callable[[int], object]] = {
+    "lru": LRUCache,
+    "sharded-lru": ShardedLRUCache,
+    "lfu": LFUCache,
+    "compact-lfu": CompactLFUCache,
+    "w-tinylfu": WTinyLFUCache,
+}
+
+
+def _accumulate(values: Iterable[float]) -> Iterator[float]:
+    total = 0.0
+    for value in values:
+        total += value
+        yield total
+
+
+def zipf_trace(num_keys: int, length: int, skew: float = 1.0, offset: int = 0, seed: int = 0) -> List[int]:
+    rng = random.Random(seed)
+    weights = [1 / (rank ** skew) for rank in range(1, num_keys + 1)]
+    keys = list(range(offset, offset + num_keys))
+    rng.shuffle(keys)
+    return rng.choices(keys, cum_weights=list(_accumulate(weights)), k=length)
+
+
+def scan_trace(num_keys: int, length: int, scan_length: int = None, scan_every: int = 1000,
+               seed: int = 0) -> List[int]:
+    """ Zipf traffic interrupted by long sequential scans over never-reused keys. """
+    scan_length = scan_length or num_keys // 2
+    base = zipf_trace(num_keys, length, seed=seed)
+    trace = []
+    next_scan_key = num_keys
+    for i, key in enumerate(base):
+        trace.append(key)
+        if (i + 1) % scan_every == 0:
+            trace.extend(range(next_scan_key, next_scan_key + scan_length))
+            next_scan_key += scan_length
+            if len(trace) >= length:
+                break
+    return trace[:length]
+
+
+def shifting_trace(num_keys: int, length: int, phases: int = 4, seed: int = 0) -> List[int]:
+    """ Zipf traffic whose hot set moves to a disjoint key range every phase. """
+    per_phase = length // phases
+    trace = []
+    for phase in range(phases):
+        trace.extend(zipf_trace(num_keys, per_phase, offset=phase * num_keys, seed=seed + phase))
+    return trace
+
+
+def load_trace(path: str) -> List:
+    trace = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            trace.append(int(line) if line.lstrip("-").isdigit() else line)
+    return trace
+
+
+def hit_ratio(cache, trace: Iterable) -> float:
+    hits = requests = 0
+    for key in trace:
+        requests += 1
+        if cache.get(key) != -1:
+            hits += 1
+        else:
+            cache.put(key, key)
+    return hits / requests if requests else 0.0
+
+
+def _percentile(sorted_values: List[int], fraction: float) -> int:
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run(policy: str, capacity: int, trace: List) -> dict:
+    cache = POLICIES[policy](capacity)
+    clock = time.perf_counter_ns
+    latencies = []
+    record = latencies.append
+    hits = 0
+    started = clock()
+    for key in trace:
+        t0 = clock()
+        if cache.get(key) != -1:
+            hits += 1
+        else:
+            cache.put(key, key)
+        record(clock() - t0)
+    elapsed = (clock() - started) / 1e9
+
+    # tracemalloc slows every allocation down, so memory is measured on a
+    # separate replay rather than skewing the timings above.
+    tracemalloc.start()
+    cache = POLICIES[policy](capacity)
+    hit_ratio(cache, trace)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    ops = len(trace)
+    return {
+        "policy": policy,
+        "capacity": capacity,
+        "ops": ops,
+        "ops_per_sec": ops / elapsed if elapsed else 0.0,
+        "p50_ns": _percentile(latencies, 0.50),
+        "p99_ns": _percentile(latencies, 0.99),
+        "hit_ratio": hits / ops if ops else 0.0,
+        "peak_memory_bytes": peak,
+    }
+
+
+def build_traces(args) -> Dict[str, List]:
+    if args.trace_file:
+        return {path: load_trace(path) for path in args.trace_file}
+    return {
+        "zipf": zipf_trace(args.keys, args.length, seed=args.seed),
+        "scan": scan_trace(args.keys, args.length, seed=args.seed),
+        "shifting": shifting_trace(args.keys, args.length, seed=args.seed),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay key traces against the cache implementations.")
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=list(POLICIES))
+    parser.add_argument("--capacities", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--keys", type=int, default=50000, help="distinct keys in synthetic traces")
+    parser.add_argument("--length", type=int, default=200000, help="operations per synthetic trace")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-file", nargs="+", help="replay these files instead of synthetic traces")
+    parser.add_argument("--json", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for trace_name, trace in build_traces(args).items():
+        for capacity in args.capacities:
+            for policy in args.policies:
+                result = run(policy, capacity, trace)
+                result["trace"] = trace_name
+                results.append(result)
+                if args.json != "-":
+                    print(f"{trace_name:<10} {policy:<12} {capacity:>7} "
+                          f"{result['ops_per_sec']:>12,.0f} ops/s "
+                          f"p50 {result['p50_ns']:>6} ns p99 {result['p99_ns']:>7} ns "
+                          f"hit {result['hit_ratio']:>7.2%} "
+                          f"peak {result['peak_memory_bytes'] / 1024:>9,.1f} KiB")
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
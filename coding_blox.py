@@ -88,10 +88,16 @@ All work should be your own.
 
 LLD/leetcode-lld-flipkart-coding-blox
 """
-import itertools
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
+import itertools
 import random
-from typing import List, Dict, Optional, Set, Tuple
+import threading
+import time
+from typing import List, Dict, Optional, Set, Tuple, ValuesView
+
+from data_strutures.indexable_skip_list import IndexableSkipList
 
 
 class Difficulty(Enum):
@@ -100,6 +106,11 @@ class Difficulty(Enum):
     High = 30
 
 
+class Order(Enum):
+    Ascending = "asc"
+    Descending = "desc"
+
+
 class IdGenerator:
 
     def __init__(self, start: int = 0):
@@ -113,9 +124,11 @@ class IdGenerator:
 
 class User:
     id_gen = IdGenerator().generator()
+    default_score = 1500
 
     def __init__(self, name: str):
         self.name = name
+        self.score = User.default_score
 
 
 class Question:
@@ -125,11 +138,54 @@ class Question:
         self.id = next(Question.id_gen)
         self.difficulty = difficulty
         self.statement = statement
+        self.score = difficulty.value
+
+
+class Leaderboard:
+    """
+    Scores of users kept in an indexable skip list keyed by (-score, name),
+    so the highest score comes first and ties are broken by name. Updating a
+    score, the rank of a user and a page of the board are all O(log n) (plus
+    the page size), in either order, instead of re-sorting on every change.
+    """
+
+    def __init__(self):
+        self.scores: Dict[str, int] = {}
+        self.index = IndexableSkipList()
+
+    def __len__(self):
+        return len(self.scores)
+
+    def update(self, name: str, score: int):
+        old_score = self.scores.get(name)
+        if old_score is not None:
+            self.index.delete((-old_score, name))
+        self.scores[name] = score
+        self.index.insert((-score, name), score)
+
+    def remove(self, name: str):
+        score = self.scores.pop(name, None)
+        if score is not None:
+            self.index.delete((-score, name))
+
+    def rank(self, name: str, order: Order = Order.Descending) -> Optional[int]:
+        """ 1-based position of the user, None if they are not on the board. """
+        score = self.scores.get(name)
+        if score is None:
+            return None
+        rank = self.index.rank((-score, name))
+        return rank + 1 if order is Order.Descending else len(self.scores) - rank
+
+    def top(self, k: int = 10, order: Order = Order.Descending, offset: int = 0) -> List[Tuple[str, int]]:
+        page = self.index.page(offset, k, reverse=order is Order.Ascending)
+        return [(name, score) for (_, name), score in page]
 
 
 class Contest:
     id_gen = IdGenerator(1).generator()
 
+    penalties = {Difficulty.Low: 50, Difficulty.Medium: 30, Difficulty.High: 0}
+
     def __init__(self, name: str, difficulty: Difficulty, creator: User):
         self.id = next(Contest.id_gen)
         self.name = name
@@ -137,7 +193,8 @@ class Contest:
         self.creator = creator
         self.participants: Set[User] = {creator}
         self.scores: Dict[User, int] = {}
-        self.leaderboard: List[Tuple[str, int, List[int]]] = []  # Fixed length: 10
+        self.questions_solved: Dict[str, List[int]] = {}
+        self.leaderboard = Leaderboard()
 
     def add_participant(self, user: User):
         self.participants.add(user)
@@ -145,23 +202,60 @@ class Contest:
     def remove_participant(self, user: User):
         self.participants.remove(user)
 
-    def update_scores(self, solved: Dict[User, List[Question]]):
-        all_questions_solved = set(itertools.chain(solved.values()))
-        contest_score = len(all_questions_solved) * self.difficulty.value
-        sub = 0
-        if self.difficulty == Difficulty.Low:
-            sub = 50
-        elif self.difficulty == Difficulty.Medium:
-            sub = 30
+    def update_scores(self, solved: Dict[User, List[Question]]) -> Dict[User, int]:
+        """
+        Records the contest points of every participant and returns the change
+        to their rating: points minus the penalty of the contest level.
+        """
+        penalty = Contest.penalties[self.difficulty]
+        rating_changes = {}
         for participant, questions_solved in solved.items():
-            score = ((contest_score - sub) + self.difficulty.value) * len(questions_solved)
-            if participant in self.participants:
-                self.scores[participant] += score
-            self.update_leaderboard(score, participant, [ques.id for ques in questions_solved])
+            if participant not in self.participants:
+                continue
+            points = sum(question.score for question in questions_solved)
+            self.scores[participant] = points
+            self.update_leaderboard(points, participant, [ques.id for ques in questions_solved])
+            rating_changes[participant] = points - penalty
+        return rating_changes
 
     def update_leaderboard(self, score: int, participant: User, questions_solved: List[int]):
-        self.leaderboard.append((participant.name, score, questions_solved))
-        self.leaderboard = list(sorted(self.leaderboard, key=lambda x: x[1], reverse=True))[:10]
+        self.questions_solved[participant.name] = questions_solved
+        self.leaderboard.update(participant.name, score)
+
+    def history(self, order: Order = Order.Descending) -> List[Tuple[str, int, List[int]]]:
+        return [(name, score, self.questions_solved[name])
+                for name, score in self.leaderboard.top(len(self.leaderboard), order)]
+
+
+def simulate_contest(question_ids: List[int], participants: List[str], rng=random) -> Dict[str, List[int]]:
+    """
+    Picks the questions every participant solves. `rng` is anything with the
+    interface of the random module; pass a seeded random.Random to make the
+    outcome reproducible.
+    """
+    question_ids = list(question_ids)
+    rng.shuffle(question_ids)
+    return {
+        name: rng.sample(question_ids, k=rng.randint(0, len(question_ids)))
+        for name in participants
+    }
+
+
+_worker_catalog: Dict[str, List[int]] = {}
+
+
+def _init_contest_worker(catalog: Dict[str, List[int]]):
+    # The question catalog is shipped once per worker, not once per contest.
+    global _worker_catalog
+    _worker_catalog = catalog
+
+
+def _run_contest_task(task: Tuple[int, str, Optional[int], List[str], str]) -> Tuple[int, Dict[str, List[int]]]:
+    contest_id, difficulty, num_questions, participants, seed = task
+    question_ids = _worker_catalog[difficulty]
+    if num_questions:
+        question_ids = question_ids[:num_questions]
+    return contest_id, simulate_contest(question_ids, participants, random.Random(seed))
 
 
 class CodingPlatform:
@@ -170,6 +264,17 @@ class CodingPlatform:
         self.questions: Dict[int, Question] = {}
         self.contests: Dict[int, Contest] = {}
         self.users: Dict[str, User] = {}
+        self.leaderboard = Leaderboard()
+        # Guards user scores and the global leaderboard while results are merged.
+        self.lock = threading.Lock()
+        # Secondary indexes by difficulty, kept in step with the dicts above.
+        # Dicts keep insertion order, so their value views list in id order.
+        self.questions_by_difficulty: Dict[Difficulty, Dict[int, Question]] = {
+            difficulty: {} for difficulty in Difficulty
+        }
+        self.contests_by_difficulty: Dict[Difficulty, Dict[int, Contest]] = {
+            difficulty: {} for difficulty in Difficulty
+        }
 
     def create_user(self, username: str) -> Optional[User]:
         if username in self.users:
@@ -177,11 +282,19 @@ class CodingPlatform:
         else:
             user = User(username)
             self.users[username] = user
+            self.leaderboard.update(username, user.score)
             return user
 
     def create_question(self, statement: str, difficulty: Difficulty) -> Question:
         question = Question(statement, difficulty)
         self.questions[question.id] = question
+        self.questions_by_difficulty[difficulty][question.id] = question
+        return question
+
+    def delete_question(self, question_id: int) -> Optional[Question]:
+        question = self.questions.pop(question_id, None)
+        if question:
+            del self.questions_by_difficulty[question.difficulty][question_id]
         return question
 
     def create_contest(self, name: str, difficulty: Difficulty, creator: str) -> Optional[Contest]:
@@ -189,17 +302,26 @@ class CodingPlatform:
         if user:
             contest = Contest(name, difficulty, user)
             self.contests[contest.id] = contest
+            self.contests_by_difficulty[difficulty][contest.id] = contest
             return contest
 
-    def list_questions(self, difficulty: Optional[Difficulty]) -> List[Question]:
+    def delete_contest(self, contest_id: int) -> Optional[Contest]:
+        contest = self.contests.pop(contest_id, None)
+        if contest:
+            del self.contests_by_difficulty[contest.difficulty][contest_id]
+        return contest
+
+    def list_questions(self, difficulty: Optional[Difficulty] = None) -> ValuesView[Question]:
+        """ Live view over the questions, nothing is copied. """
         if difficulty:
-            return list(filter(lambda x: x.difficulty == difficulty, self.questions.values()))
-        return list(self.questions.values())
+            return self.questions_by_difficulty[difficulty].values()
+        return self.questions.values()
 
-    def list_contests(self, difficulty: Optional[Difficulty]) -> List[Contest]:
+    def list_contests(self, difficulty: Optional[Difficulty] = None) -> ValuesView[Contest]:
+        """ Live view over the contests, nothing is copied. """
         if difficulty:
-            return list(filter(lambda x: x.difficulty == difficulty, self.contests.values()))
-        return list(self.contests.values())
+            return self.contests_by_difficulty[difficulty].values()
+        return self.contests.values()
 
     def attend_contest(self, contest_id: int, user_name: str):
         contest = self.contests.get(contest_id)
@@ -227,28 +349,163 @@ class CodingPlatform:
                     print("You are not authorized to start this contest!")
                 else:
                     # Get random questions
-                    questions = list(filter(
-                        lambda x: x.difficulty == contest.difficulty, self.questions.values()
-                    ))
+                    questions = self.list_questions(contest.difficulty)
                     if num_questions:
-                        questions = questions[:num_questions]
-                    random.shuffle(questions)
-                    solved = {}
-                    for participant in contest.participants:
-                        questions_solved_by_participant = random.choices(questions, k=random.randint(0, len(questions)))
-                        solved[participant] = questions_solved_by_participant
-                    contest.update_scores(solved)
-
-
-def main():
-    user1 = User("John")
-    user2 = User("Jane")
-
-    ques1 = Question("What?", Difficulty.Low)
-    ques2 = Question("When?", Difficulty.Medium)
-    ques3 = Question("How?", Difficulty.High)
-
-    print(ques1.id, ques2.id, ques3.id)
+                        questions = itertools.islice(questions, num_questions)
+                    participants = [participant.name for participant in contest.participants]
+                    solved = simulate_contest([question.id for question in questions], participants)
+                    self._apply_results({contest_id: solved})
+
+    def run_contests(self, contest_ids: List[int], num_questions: Optional[int] = None, workers: Optional[int] = None,
+                     seed: int = 0) -> None:
+        """
+        Simulates many contests at once in a process pool (in this process
+        when `workers` is 0).
+
+        Every contest gets its own generator seeded from (`seed`, contest id),
+        so results do not depend on the number of workers or on scheduling.
+        Nothing is applied until every contest has finished; the results are
+        then merged into the users and leaderboards in contest id order,
+        under the platform lock.
+        """
+        contests = []
+        for contest_id in contest_ids:
+            contest = self.contests.get(contest_id)
+            if not contest:
+                print(f"Contest {contest_id} not found!")
+                return
+            contests.append(contest)
+
+        catalog = {difficulty.name: list(self.questions_by_difficulty[difficulty])
+                   for difficulty in {contest.difficulty for contest in contests}}
+        tasks = [
+            (contest.id, contest.difficulty.name, num_questions,
+             sorted(participant.name for participant in contest.participants), f"{seed}:{contest.id}")
+            for contest in contests
+        ]
+        if workers == 0:
+            _init_contest_worker(catalog)
+            results = dict(map(_run_contest_task, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_contest_worker,
+                                     initargs=(catalog,)) as pool:
+                results = dict(pool.map(_run_contest_task, tasks, chunksize=max(1, len(tasks) // 64)))
+        self._apply_results(results)
+
+    def _apply_results(self, results: Dict[int, Dict[str, List[int]]]):
+        with self.lock:
+            for contest_id in sorted(results):
+                contest = self.contests[contest_id]
+                solved = {
+                    self.users[name]: [self.questions[question_id] for question_id in question_ids]
+                    for name, question_ids in results[contest_id].items()
+                }
+                for participant, change in contest.update_scores(solved).items():
+                    participant.score += change
+                    self.leaderboard.update(participant.name, participant.score)
+
+    def leader_board(self, order: Order = Order.Descending, k: int = 10, offset: int = 0) -> List[Tuple[str, int]]:
+        return self.leaderboard.top(k, order, offset)
+
+    def rank_of(self, user_name: str, order: Order = Order.Descending) -> Optional[int]:
+        return self.leaderboard.rank(user_name, order)
+
+    def contest_history(self, contest_id: int) -> List[Tuple[str, int, List[int]]]:
+        contest = self.contests.get(contest_id)
+        if not contest:
+            print("Contest not found!")
+            return []
+        return contest.history()
+
+
+def benchmark(num_questions: int = 1_000_000, participants: int = 100, questions_per_contest: int = 20):
+    platform = CodingPlatform()
+    difficulties = list(Difficulty)
+    for i in range(num_questions):
+        platform.create_question(f"Question {i}", difficulties[i % len(difficulties)])
+    for i in range(participants):
+        platform.create_user(f"user{i}")
+    contest = platform.create_contest("benchmark", Difficulty.Medium, "user0")
+    for i in range(1, participants):
+        platform.attend_contest(contest.id, f"user{i}")
+
+    def timed(label: str, fn, repeat: int = 10):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        print(f"{label:<36} {(time.perf_counter() - started) / repeat * 1000:>10.3f} ms")
+
+    print(f"{num_questions:,} questions, {participants} participants")
+    # Both sides build the full result list; the index saves the scan over other difficulties.
+    timed("ListQuestion MEDIUM list (scan)",
+          lambda: list(filter(lambda x: x.difficulty == Difficulty.Medium, platform.questions.values())), 3)
+    timed("ListQuestion MEDIUM list (index)", lambda: list(platform.list_questions(Difficulty.Medium)))
+    timed("ListQuestion MEDIUM first 100", lambda: list(itertools.islice(platform.list_questions(Difficulty.Medium), 100)))
+    timed("ListContest MEDIUM list (index)", lambda: list(platform.list_contests(Difficulty.Medium)))
+    timed(f"RunContest with {questions_per_contest} questions",
+          lambda: platform.run_contest(contest.id, "user0", questions_per_contest))
+
+
+def benchmark_contests(num_contests: int = 2000, workers: Optional[int] = None, users: int = 200,
+                       participants: int = 50, questions: int = 300):
+    def build():
+        # Restart the ids so both runs see the same contest ids, and so the same seeds.
+        Question.id_gen = IdGenerator(1).generator()
+        Contest.id_gen = IdGenerator(1).generator()
+        platform = CodingPlatform()
+        for i in range(questions):
+            platform.create_question(f"Question {i}", list(Difficulty)[i % len(Difficulty)])
+        for i in range(users):
+            platform.create_user(f"user{i}")
+        rng = random.Random(0)
+        for i in range(num_contests):
+            contest = platform.create_contest(f"contest{i}", rng.choice(list(Difficulty)), f"user{i % users}")
+            for name in rng.sample(sorted(platform.users), participants):
+                platform.attend_contest(contest.id, name)
+        return platform
+
+    standings = []
+    for label, count in (("in-process", 0), (f"{workers or 'all'} workers", workers)):
+        platform = build()
+        started = time.perf_counter()
+        platform.run_contests(list(platform.contests), workers=count, seed=42)
+        elapsed = time.perf_counter() - started
+        standings.append(platform.leader_board(k=users))
+        print(f"{num_contests} contests {label:<12} {elapsed:>7.2f}s {num_contests / elapsed:>9,.0f} contests/s")
+    print("Identical results:", standings[0] == standings[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coding Blox demo.")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="time catalog queries with N questions")
+    parser.add_argument("--run-contests", type=int, metavar="N", help="simulate N contests in a process pool")
+    parser.add_argument("--workers", type=int, help="worker processes for --run-contests")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if args.run_contests:
+        benchmark_contests(args.run_contests, args.workers)
+        return
+
+    platform = CodingPlatform()
+    for name in ("Ross", "Monica", "Joey", "Chandler"):
+        platform.create_user(name)
+    for i in range(1, 7):
+        platform.create_question(f"Question {i}", Difficulty.Low)
+        platform.create_question(f"Question {i}", Difficulty.High)
+
+    contest = platform.create_contest("diwali_contest", Difficulty.Low, "Ross")
+    platform.attend_contest(contest.id, "Monica")
+    platform.attend_contest(contest.id, "Joey")
+    platform.run_contest(contest.id, "Ross", None)
+
+    for name, points, questions in platform.contest_history(contest.id):
+        print(f"{name}: {points} {questions}")
+    print()
+    for name, score in platform.leader_board(Order.Descending):
+        print(f"{name}: {score}")
+    print("Rank of Joey:", platform.rank_of("Joey"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+import random
+
+
+class IndexableSkipNode:
+    __slots__ = ("key", "value", "forward", "width", "backward")
+
+    def __init__(self, key=None, value=None, level=0):
+        self.key = key
+        self.value = value
+        self.forward = [None] * (level + 1)   # Next node at each level
+        self.width = [1] * (level + 1)        # Number of level-0 steps each forward link skips
+        self.backward = None                  # Previous node at level 0, for descending walks
+
+
+class IndexableSkipList:
+    """
+    Skip list that also knows the position of every node.
+
+    Each forward link stores how many elements it jumps over, so walking down
+    the levels can count positions on the way. That gives O(log n) rank
+    queries and access by index on top of the usual insert/search/delete, and
+    the level-0 backward links allow walking the list in descending order.
+
+    Keys must be unique and comparable with each other.
+    """
+
+    def __init__(self, max_levels=32):
+        self.max_levels = max_levels
+        self.header = IndexableSkipNode(level=max_levels - 1)
+        self.level = 0      # Highest level currently in use
+        self.size = 0
+        self.tail = None    # Last node, entry point for descending walks
+
+    def __len__(self):
+        return self.size
+
+    def random_level(self):
+        level = 0
+        while random.random() < 0.5 and level < self.max_levels - 1:
+            level += 1
+        return level
+
+    def _find(self, key):
+        """
+        Find the last node before `key` on every level.
+
+        :return: (chain, steps) where chain[i] is that node on level i and
+                 steps[i] its position (the header is position 0).
+        """
+        chain = [None] * (self.level + 1)
+        steps = [0] * (self.level + 1)
+        node = self.header
+        position = 0
+        for i in range(self.level, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                position += node.width[i]
+                node = node.forward[i]
+            chain[i] = node
+            steps[i] = position
+        return chain, steps
+
+    def insert(self, key, value):
+        """
+        Insert a key-value pair, or update the value if the key is present.
+
+        :param key: Key to be inserted.
+        :param value: Value associated with the key.
+        """
+        chain, steps = self._find(key)
+        current = chain[0].forward[0]
+        if current is not None and current.key == key:
+            current.value = value
+            return
+
+        new_level = self.random_level()
+        if new_level > self.level:
+            for i in range(self.level + 1, new_level + 1):
+                # An unused header level links straight to the end of the list.
+                self.header.forward[i] = None
+                self.header.width[i] = self.size + 1
+                chain.append(self.header)
+                steps.append(0)
+            self.level = new_level
+
+        new_node = IndexableSkipNode(key, value, new_level)
+        for i in range(new_level + 1):
+            previous = chain[i]
+            gap = steps[0] - steps[i]
+            new_node.forward[i] = previous.forward[i]
+            previous.forward[i] = new_node
+            new_node.width[i] = previous.width[i] - gap
+            previous.width[i] = gap + 1
+        for i in range(new_level + 1, self.level + 1):
+            chain[i].width[i] += 1
+
+        new_node.backward = chain[0] if chain[0] is not self.header else None
+        if new_node.forward[0] is not None:
+            new_node.forward[0].backward = new_node
+        else:
+            self.tail = new_node
+        self.size += 1
+
+    def delete(self, key):
+        """
+        Delete a key from the skip list.
+
+        :param key: Key to be deleted.
+        :return: True if the key was present.
+        """
+        chain, _ = self._find(key)
+        current = chain[0].forward[0]
+        if current is None or current.key != key:
+            return False
+
+        for i in range(self.level + 1):
+            previous = chain[i]
+            if previous.forward[i] is current:
+                previous.width[i] += current.width[i] - 1
+                previous.forward[i] = current.forward[i]
+            else:
+                previous.width[i] -= 1
+
+        if current.forward[0] is not None:
+            current.forward[0].backward = current.backward
+        else:
+            self.tail = current.backward
+        while self.level > 0 and self.header.forward[self.level] is None:
+            self.level -= 1
+        self.size -= 1
+        return True
+
+    def search(self, key):
+        """
+        :return: Value associated with `key`, None if the key is not present.
+        """
+        chain, _ = self._find(key)
+        current = chain[0].forward[0]
+        if current is not None and current.key == key:
+            return current.value
+        return None
+
+    def rank(self, key):
+        """
+        :return: 0-based position of `key` in ascending order, None if not present.
+        """
+        chain, steps = self._find(key)
+        current = chain[0].forward[0]
+        if current is not None and current.key == key:
+            return steps[0]
+        return None
+
+    def _node_at(self, index):
+        position = index + 1
+        node = self.header
+        for i in range(self.level, -1, -1):
+            while node.forward[i] is not None and node.width[i] <= position:
+                position -= node.width[i]
+                node = node.forward[i]
+        return node
+
+    def at(self, index):
+        """
+        :param index: 0-based position in ascending order, negative counts from the end.
+        :return: (key, value) at that position.
+        """
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("skip list index out of range")
+        node = self._node_at(index)
+        return node.key, node.value
+
+    def items(self, offset=0, reverse=False):
+        """
+        Iterate (key, value) pairs starting `offset` elements from the start,
+        or from the end when `reverse` is set. Finding the start is O(log n),
+        every following item is O(1).
+        """
+        if not 0 <= offset < self.size:
+            return
+        if reverse:
+            node = self._node_at(self.size - 1 - offset) if offset else self.tail
+            while node is not None:
+                yield node.key, node.value
+                node = node.backward
+        else:
+            node = self._node_at(offset)
+            while node is not None:
+                yield node.key, node.value
+                node = node.forward[0]
+
+    def page(self, offset=0, limit=10, reverse=False):
+        """
+        :return: Up to `limit` (key, value) pairs after skipping `offset`, in O(log n + limit).
+        """
+        result = []
+        for item in self.items(offset, reverse):
+            if len(result) == limit:
+                break
+            result.append(item)
+        return result
+
+
+if __name__ == "__main__":
+    skip_list = IndexableSkipList()
+    for key in [30, 10, 50, 20, 40]:
+        skip_list.insert(key, str(key))
+
+    print("Rank of 40:", skip_list.rank(40))              # Expected output: 3
+    print("Element at 1:", skip_list.at(1))               # Expected output: (20, '20')
+    print("Top 2 descending:", skip_list.page(0, 2, reverse=True))  # Expected output: [(50, '50'), (40, '40')]
+
+    skip_list.delete(20)
+    print("Page from 1:", skip_list.page(1, 10))          # Expected output: [(30, '30'), (40, '40'), (50, '50')]
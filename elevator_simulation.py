@@ -0,0 +1,349 @@
+"""
+Discrete-event simulation of an elevator bank, for comparing dispatch policies.
+
+Time is virtual. The only events are passenger arrivals and cars reaching
+their next stop or closing their doors, so a car crossing 40 floors is one
+event instead of 40 sleeps. Cars follow the same LOOK rules as
+`elevator_syatem.Elevator`, and passengers arrive as `Request`s carrying both
+their floor and their destination, as on a destination-dispatch panel.
+
+For every traffic pattern and policy we report average and maximum waiting
+time (arrival to boarding), average journey time (arrival to leaving the
+car) and throughput in passengers per simulated hour.
+
+Usage:
+    python elevator_simulation.py
+    python elevator_simulation.py --floors 100 --cars 12 --passengers 1000000 --policies look
+    python elevator_simulation.py --patterns up-peak --rate 0.6 --json results.json
+"""
+import argparse
+import heapq
+import json
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from elevator_syatem import Direction, Request, RequestType, look_due, look_eta, look_next_stop
+
+TimedRequest = Tuple[float, Request]
+
+PATTERNS = ("up-peak", "down-peak", "inter-floor")
+
+
+def traffic(pattern: str, num_floors: int, passengers: int, rate: float, seed: int = 0,
+            lobby: int = 0) -> Iterator[TimedRequest]:
+    """
+    Poisson arrivals at `rate` passengers per second.
+
+    up-peak: everyone starts at the lobby, e.g. the morning rush.
+    down-peak: everyone heads to the lobby, e.g. the evening rush.
+    inter-floor: random trips between any two floors.
+    """
+    if pattern not in PATTERNS:
+        raise ValueError(f"unknown traffic pattern {pattern!r}")
+    rng = random.Random(seed)
+    upper = [floor for floor in range(num_floors) if floor != lobby]
+    now = 0.0
+    for _ in range(passengers):
+        now += rng.expovariate(rate)
+        if pattern == "up-peak":
+            src, dest = lobby, rng.choice(upper)
+        elif pattern == "down-peak":
+            src, dest = rng.choice(upper), lobby
+        else:
+            src, dest = rng.randrange(num_floors), rng.randrange(num_floors - 1)
+            dest += dest >= src
+        direction = Direction.Up if dest > src else Direction.Down
+        yield now, Request(src, RequestType.External, dest=dest, direction=direction)
+
+
+class SimCar:
+    """
+    A car's state between events. While travelling, `floor` is where it left
+    from at time `departed` and `target` where it is heading.
+    """
+
+    __slots__ = ("index", "floor", "direction", "up", "down", "promised", "promised_counts",
+                 "assigned", "waiting", "left_behind", "riders", "load", "target", "departed", "busy", "version")
+
+    def __init__(self, index: int, num_floors: int):
+        self.index = index
+        self.floor = 0
+        self.direction: Optional[Direction] = None
+        self.up = 0                 # bitset of stops to serve going up
+        self.down = 0               # bitset of stops to serve going down
+        self.promised = 0           # bitset of destinations of passengers not yet picked up
+        self.promised_counts = [0] * num_floors
+        self.assigned = 0           # passengers waiting for this car
+        self.waiting: Dict[Tuple[int, Direction], List[Tuple[float, int]]] = {}  # -> [(arrival, dest)]
+        self.left_behind: List[Tuple[int, Direction]] = []  # calls a full car still owes, re-lit on leaving
+        self.riders: Dict[int, List[float]] = {}  # dest -> arrival times
+        self.load = 0
+        self.target: Optional[int] = None
+        self.departed = 0.0
+        self.busy = False           # an event is scheduled for this car
+        self.version = 0            # bumped on every schedule; stale events are skipped
+
+    @property
+    def pending(self) -> int:
+        return self.up | self.down
+
+    def position(self, now: float, floor_time: float) -> int:
+        """ The nearest floor the car can still stop at. """
+        if self.target is None:
+            return self.floor
+        travelled = min(math.ceil((now - self.departed) / floor_time - 1e-9), abs(self.target - self.floor))
+        return self.floor + travelled if self.target > self.floor else self.floor - travelled
+
+
+Policy = Callable[["Simulation", float, int, Direction], SimCar]
+
+
+def look_policy(sim: "Simulation", now: float, floor: int, direction: Direction) -> SimCar:
+    """
+    The car that would arrive soonest finishing its sweep, like
+    `ElevatorBank.best_car`. A car already promised to more people than it
+    holds counts as one extra round trip away.
+    """
+    floor_time, stop_penalty, capacity = sim.floor_time, sim.stop_penalty, sim.capacity
+    round_trip = 2 * sim.num_floors
+    best, best_cost = None, None
+    for car in sim.cars:
+        pending = car.up | car.down
+        here = car.floor if car.target is None else car.position(now, floor_time)
+        heading = car.direction
+        if heading is None:
+            target = look_next_stop(here, None, pending)
+            heading = Direction.Down if target is not None and target < here else Direction.Up
+        cost = look_eta(here, heading, pending | car.promised, floor, direction) + stop_penalty * pending.bit_count()
+        if car.load + car.assigned >= capacity:
+            cost += round_trip
+        if best is None or cost < best_cost:
+            best, best_cost = car, cost
+    return best
+
+
+def nearest_car_policy(sim: "Simulation", now: float, floor: int, direction: Direction) -> SimCar:
+    """
+    The closest car. Ties (all cars parked in the lobby, say) go to the least
+    loaded one, then rotate with the call count so they do not all pile onto
+    car 0.
+    """
+    num_cars = len(sim.cars)
+    return min(sim.cars, key=lambda car: (abs(car.position(now, sim.floor_time) - floor),
+                                          car.load + car.assigned,
+                                          (car.index - sim.calls) % num_cars))
+
+
+def round_robin_policy(sim: "Simulation", now: float, floor: int, direction: Direction) -> SimCar:
+    return sim.cars[sim.calls % len(sim.cars)]
+
+
+POLICIES: Dict[str, Policy] = {
+    "look": look_policy,
+    "nearest": nearest_car_policy,
+    "round-robin": round_robin_policy,
+}
+
+
+class Simulation:
+
+    def __init__(self,
+                 num_floors: int,
+                 num_cars: int,
+                 policy: str = "look",
+                 floor_time: float = 1.5,
+                 door_time: float = 8.0,
+                 capacity: int = 16,
+                 stop_penalty: int = 2):
+        """
+        :param floor_time: Seconds to travel one floor.
+        :param door_time: Seconds for a stop: doors opening, people moving, doors closing.
+        :param capacity: Riders per car. Passengers left behind wait for the next visit.
+        """
+        self.num_floors = num_floors
+        self.policy = POLICIES[policy]
+        self.floor_time = floor_time
+        self.door_time = door_time
+        self.capacity = capacity
+        self.stop_penalty = stop_penalty
+        self.cars = [SimCar(i, num_floors) for i in range(num_cars)]
+        self.events: List[Tuple[float, int, int]] = []  # (time, car index, car version)
+        self.calls = 0
+        self.delivered = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_journey = 0.0
+        self.stops = 0
+
+    def _schedule(self, car: SimCar, at: float):
+        car.version += 1
+        car.busy = True
+        heapq.heappush(self.events, (at, car.index, car.version))
+
+    def _call(self, now: float, arrival: float, src: int, dest: int):
+        direction = Direction.Up if dest > src else Direction.Down
+        car = self.policy(self, now, src, direction)
+        self.calls += 1
+        car.waiting.setdefault((src, direction), []).append((arrival, dest))
+        car.assigned += 1
+        if car.promised_counts[dest] == 0:
+            car.promised |= 1 << dest
+        car.promised_counts[dest] += 1
+        if direction == Direction.Up:
+            car.up |= 1 << src
+        else:
+            car.down |= 1 << src
+
+        if not car.busy:
+            self._schedule(car, now)
+        elif car.target is not None and car.target != src:
+            # Already on the way somewhere: stop earlier if `src` is still ahead on the route.
+            here = car.position(now, self.floor_time)
+            if min(here, car.target) <= src <= max(here, car.target) and \
+                    (src - car.floor) * (car.target - car.floor) > 0:
+                car.target = src
+                self._schedule(car, car.departed + abs(src - car.floor) * self.floor_time)
+
+    def _act(self, car: SimCar, now: float):
+        """ The car has reached `target` or closed its doors: serve this floor or head on. """
+        if car.target is not None:
+            car.floor, car.target = car.target, None
+        floor = car.floor
+        direction = look_due(floor, car.direction, car.up, car.down)
+        if direction is None:
+            target = look_next_stop(floor, car.direction, car.pending)
+            if target is None:
+                car.direction = None
+                car.busy = False
+            else:
+                car.direction = Direction.Up if target > floor else Direction.Down
+                car.target, car.departed = target, now
+                self._schedule(car, now + abs(target - floor) * self.floor_time)
+            for src, call_direction in car.left_behind:
+                if call_direction == Direction.Up:
+                    car.up |= 1 << src
+                else:
+                    car.down |= 1 << src
+            car.left_behind.clear()
+            return
+
+        self.stops += 1
+        car.direction = direction
+        if direction == Direction.Up:
+            car.up &= ~(1 << floor)
+        else:
+            car.down &= ~(1 << floor)
+
+        arrivals = car.riders.pop(floor, ())
+        for arrival in arrivals:
+            self.total_journey += now - arrival
+        self.delivered += len(arrivals)
+        car.load -= len(arrivals)
+
+        waiting = car.waiting.pop((floor, direction), ())
+        room = self.capacity - car.load
+        boarding = waiting[:room]
+        car.assigned -= len(boarding)
+        for arrival, dest in boarding:
+            wait = now - arrival
+            self.total_wait += wait
+            if wait > self.max_wait:
+                self.max_wait = wait
+            car.riders.setdefault(dest, []).append(arrival)
+            car.promised_counts[dest] -= 1
+            if car.promised_counts[dest] == 0:
+                car.promised &= ~(1 << dest)
+            if dest > floor:
+                car.up |= 1 << dest
+            else:
+                car.down |= 1 << dest
+        car.load += len(boarding)
+        if len(waiting) > room:
+            # Whoever did not fit waits for this car's next visit.
+            car.waiting[floor, direction] = waiting[room:]
+            car.left_behind.append((floor, direction))
+        self._schedule(car, now + self.door_time)
+
+    def run(self, requests: Iterable[TimedRequest]) -> dict:
+        """
+        Replays `requests`, which must be sorted by time and carry a `dest`,
+        until every passenger has been delivered.
+        """
+        requests = iter(requests)
+        pending = next(requests, None)
+        events, cars = self.events, self.cars
+        first = last = None
+        now = 0.0
+        while pending is not None or events:
+            if pending is not None and (not events or pending[0] <= events[0][0]):
+                now, request = pending
+                if request.dest is None:
+                    raise ValueError("simulated requests need a destination")
+                if first is None:
+                    first = now
+                self._call(now, now, request.src, request.dest)
+                pending = next(requests, None)
+            else:
+                now, index, version = heapq.heappop(events)
+                car = cars[index]
+                if version == car.version:
+                    self._act(car, now)
+                    last = now
+        delivered = self.delivered
+        duration = (last - first) if delivered else 0.0
+        return {
+            "passengers": delivered,
+            "avg_wait": self.total_wait / delivered if delivered else 0.0,
+            "max_wait": self.max_wait,
+            "avg_journey": self.total_journey / delivered if delivered else 0.0,
+            "throughput_per_hour": delivered / duration * 3600 if duration else 0.0,
+            "stops": self.stops,
+            "simulated_seconds": duration,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate elevator dispatch policies on synthetic traffic.")
+    parser.add_argument("--floors", type=int, default=40)
+    parser.add_argument("--cars", type=int, default=8)
+    parser.add_argument("--passengers", type=int, default=200000, help="passengers per pattern and policy")
+    parser.add_argument("--rate", type=float, default=0.4, help="arrivals per second")
+    parser.add_argument("--patterns", nargs="+", choices=PATTERNS, default=list(PATTERNS))
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=list(POLICIES))
+    parser.add_argument("--capacity", type=int, default=16)
+    parser.add_argument("--floor-time", type=float, default=1.5)
+    parser.add_argument("--door-time", type=float, default=8.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for pattern in args.patterns:
+        for policy in args.policies:
+            sim = Simulation(args.floors, args.cars, policy, floor_time=args.floor_time,
+                             door_time=args.door_time, capacity=args.capacity)
+            started = time.perf_counter()
+            result = sim.run(traffic(pattern, args.floors, args.passengers, args.rate, seed=args.seed))
+            result.update(pattern=pattern, policy=policy, wall_seconds=time.perf_counter() - started)
+            results.append(result)
+            if args.json != "-":
+                print(f"{pattern:<12} {policy:<12} {result['passengers']:>9,} passengers "
+                      f"wait {result['avg_wait']:>7.1f} s (max {result['max_wait']:>7.1f}) "
+                      f"journey {result['avg_journey']:>7.1f} s "
+                      f"{result['throughput_per_hour']:>7,.0f}/h "
+                      f"in {result['wall_seconds']:.1f} s")
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
+import threading
 import time
 from enum import Enum
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 class State(Enum):
@@ -36,23 +37,171 @@ class Request:
         self.direction = direction
 
 
+def lowest_at_or_above(bits: int, floor: int) -> Optional[int]:
+    """ Lowest set bit at position >= floor, None if there is none. """
+    bits = bits >> floor << floor if floor > 0 else bits
+    return (bits & -bits).bit_length() - 1 if bits else None
+
+
+def highest_at_or_below(bits: int, floor: int) -> Optional[int]:
+    """ Highest set bit at position <= floor, None if there is none. """
+    if floor < 0:
+        return None
+    bits &= (1 << (floor + 1)) - 1
+    return bits.bit_length() - 1 if bits else None
+
+
+class StopSet:
+    """
+    Floors with a pending stop, kept as the bits of one int. Reads and writes
+    look like the old list of booleans, while "is there anything left" and
+    "next stop above/below" are a couple of int operations instead of a scan
+    over every floor.
+    """
+
+    __slots__ = ("bits", "num_floors")
+
+    def __init__(self, num_floors: int):
+        self.bits = 0
+        self.num_floors = num_floors
+
+    def _index(self, floor: int) -> int:
+        if floor < 0:
+            floor += self.num_floors
+        if not 0 <= floor < self.num_floors:
+            raise IndexError("floor out of range")
+        return floor
+
+    def __getitem__(self, floor: int) -> bool:
+        return bool(self.bits >> self._index(floor) & 1)
+
+    def __setitem__(self, floor: int, value: bool):
+        if value:
+            self.bits |= 1 << self._index(floor)
+        else:
+            self.bits &= ~(1 << self._index(floor))
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __len__(self):
+        return self.num_floors
+
+    def __iter__(self) -> Iterator[bool]:
+        return (bool(self.bits >> floor & 1) for floor in range(self.num_floors))
+
+    def next_above(self, floor: int) -> Optional[int]:
+        return lowest_at_or_above(self.bits, floor)
+
+    def next_below(self, floor: int) -> Optional[int]:
+        return highest_at_or_below(self.bits, floor)
+
+
+def look_next_stop(floor: int, direction: Optional[Direction], pending: int) -> Optional[int]:
+    """
+    LOOK: the nearest stop ahead in `direction`, else the nearest one behind
+    (the car turns around), else None. Without a direction the closest wins.
+    """
+    if not pending:
+        return None
+    above = lowest_at_or_above(pending, floor + 1)
+    below = highest_at_or_below(pending, floor - 1)
+    if direction == Direction.Down:
+        return below if below is not None else above
+    if direction == Direction.Up:
+        return above if above is not None else below
+    if above is None or below is None:
+        return above if below is None else below
+    return above if above - floor <= floor - below else below
+
+
+def look_due(floor: int, direction: Optional[Direction], up_bits: int, down_bits: int) -> Optional[Direction]:
+    """
+    Whether a car at `floor` should open its doors: the floor is a stop for
+    the direction of travel, or the last stop before turning around.
+
+    :return: Direction the car leaves in, None if the floor is not due.
+    """
+    here = 1 << floor
+    if direction != Direction.Down:
+        if up_bits & here:
+            return Direction.Up
+        if down_bits & here and (up_bits | down_bits) >> (floor + 1) == 0:
+            return Direction.Down
+    if direction != Direction.Up:
+        if down_bits & here:
+            return Direction.Down
+        if up_bits & here and (up_bits | down_bits) & (here - 1) == 0:
+            return Direction.Up
+    return None
+
+
+def look_eta(here: int, heading: Direction, pending: int, floor: int, direction: Direction) -> int:
+    """
+    Floors a car at `here` moving `heading` travels before it can pick up at
+    `floor` going `direction`, if it finishes its LOOK sweep over `pending` first.
+    """
+    if not pending:
+        return abs(floor - here)
+    if heading == Direction.Up:
+        top = max(here, pending.bit_length() - 1)
+        if direction == Direction.Up and floor >= here:
+            return floor - here
+        if direction == Direction.Down:
+            top = max(top, floor)
+            return (top - here) + (top - floor)
+        bottom = min(floor, (pending & -pending).bit_length() - 1)
+        return (top - here) + (top - bottom) + (floor - bottom)
+    bottom = min(here, (pending & -pending).bit_length() - 1)
+    if direction == Direction.Down and floor <= here:
+        return here - floor
+    if direction == Direction.Up:
+        bottom = min(bottom, floor)
+        return (here - bottom) + (floor - bottom)
+    top = max(floor, pending.bit_length() - 1)
+    return (here - bottom) + (top - bottom) + (top - floor)
+
+
 class Elevator:
     def __init__(self,
                  state: State,
                  floor: int,
                  num_floors: int,
-                 direction: Optional[Direction] = None):
+                 direction: Optional[Direction] = None,
+                 floor_time: float = 0.1,
+                 door_time: float = 0.1,
+                 verbose: bool = True):
+        self._wakeup = threading.Condition()
         self.state = state
         self.direction = direction
         self.floor = floor
-        self.up_requests = [False] * num_floors
-        self.down_requests = [False] * num_floors
+        self.num_floors = num_floors
+        self.floor_time = floor_time
+        self.door_time = door_time
+        self.verbose = verbose
+        self.up_requests = StopSet(num_floors)
+        self.down_requests = StopSet(num_floors)
+        # Destination dispatch: floors to press for the riders waiting at (floor, direction)
+        self.boarding: Dict[Tuple[int, Direction], List[int]] = {}
+
+    @property
+    def state(self) -> State:
+        return self._state
+
+    @state.setter
+    def state(self, state: State):
+        # Any state change, e.g. being taken out of service, wakes a waiting dispatch loop.
+        with self._wakeup:
+            self._state = state
+            self._wakeup.notify_all()
 
     def send_request(self, request: Request):
-        if request.type == RequestType.Internal:
-            self.__serve_internal_request(request)
-        else:
-            self.__serve_external_request(request)
+        with self._wakeup:
+            if request.type == RequestType.Internal:
+                self.__serve_internal_request(request)
+            else:
+                self.__serve_external_request(request)
+            self._wakeup.notify_all()
 
     def __serve_internal_request(self, request: Request):
         if request.dest > self.floor:
@@ -66,11 +215,22 @@ class Elevator:
         else:
             self.down_requests[request.src] = True
 
+    def assign(self, src: int, dest: int):
+        """
+        Destination dispatch: pick up a rider at `src` and press `dest` for
+        them once they board, as the lobby panel already knows where they go.
+        """
+        direction = Direction.Up if dest > src else Direction.Down
+        with self._wakeup:
+            self.boarding.setdefault((src, direction), []).append(dest)
+            self.__serve_external_request(Request(src, RequestType.External, direction=direction))
+            self._wakeup.notify_all()
+
     def poll_for_requests(self):
-        if any(self.up_requests):
+        if self.up_requests:
             self.state = State.Moving
             self.direction = Direction.Up
-        if any(self.down_requests):
+        if self.down_requests:
             self.state = State.Moving
             self.direction = Direction.Down
 
@@ -96,26 +256,181 @@ class Elevator:
 
     def move(self):
         if self.direction == Direction.Up:
-            if any(self.up_requests):
+            if self.up_requests:
                 self.move_up()
-            elif any(self.down_requests):
+            elif self.down_requests:
                 self.direction = Direction.Down
             else:
                 self.stop()
         else:
-            if any(self.down_requests):
+            if self.down_requests:
                 self.move_down()
-            elif any(self.up_requests):
+            elif self.up_requests:
                 self.direction = Direction.Up
             else:
                 self.stop()
 
+    # LOOK scheduling
+
+    @property
+    def pending(self) -> int:
+        """ Every floor with a stop, either direction, as a bitset. """
+        return self.up_requests.bits | self.down_requests.bits
+
+    def next_stop(self) -> Optional[int]:
+        """
+        LOOK: the nearest stop ahead in the current direction, else the
+        nearest one behind (the car turns around), else None.
+        """
+        return look_next_stop(self.floor, self.direction, self.pending)
+
+    def _open_doors(self) -> bool:
+        """
+        Serves the current floor if it is a stop for the direction of travel,
+        or the last stop before turning around.
+        """
+        floor = self.floor
+        direction = look_due(floor, self.direction, self.up_requests.bits, self.down_requests.bits)
+        if direction is None:
+            return False
+        served = self.up_requests if direction == Direction.Up else self.down_requests
+        served[floor] = False
+        self.direction = direction
+        for dest in self.boarding.pop((floor, direction), ()):
+            self.__serve_internal_request(Request(floor, RequestType.Internal, dest=dest))
+        if self.verbose:
+            print(f"Opening at {floor}")
+        return True
+
+    def step(self) -> bool:
+        """
+        One LOOK scheduling step: open the doors here if this floor is due,
+        otherwise move one floor towards the next stop, or go idle.
+
+        :return: True if the doors opened.
+        """
+        with self._wakeup:
+            if self.state == State.Unavailable:
+                return False
+            if self._open_doors():
+                return True
+            target = self.next_stop()
+            if target is None:
+                self.direction = None
+                self.stop()
+                return False
+            self.state = State.Moving
+            self.direction = Direction.Up if target > self.floor else Direction.Down
+            self.floor += 1 if self.direction == Direction.Up else -1
+            if self.verbose:
+                print(f"Floor: {self.floor}")
+            return False
+
+    def eta(self, floor: int, direction: Direction) -> int:
+        """
+        Floors this car travels before it can pick up at `floor` going
+        `direction`, if it finishes its current LOOK sweep first. The sweep
+        extends to the floors already promised to riders still waiting.
+
+        Holds the car's lock: the dispatch thread pops `boarding` as riders get on.
+        """
+        with self._wakeup:
+            pending, here = self.pending, self.floor
+            if not pending:
+                return abs(floor - here)
+            heading = self.direction
+            if heading is None:
+                target = self.next_stop()
+                heading = Direction.Down if target is not None and target < here else Direction.Up
+            for dests in self.boarding.values():
+                for dest in dests:
+                    pending |= 1 << dest
+            return look_eta(here, heading, pending, floor, direction)
+
     def dispatch(self):
+        """
+        Runs the car until it is made Unavailable. An idle car sleeps on a
+        condition variable until a request or state change wakes it; a busy
+        one only waits for the floor-to-floor or door time.
+        """
         while True:
-            time.sleep(0.1)
-            if self.state == State.Idle:
-                self.poll_for_requests()
-            elif self.state == State.Moving:
-                self.move()
-            else:
-                return
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self.state != State.Idle or self.pending)
+                if self.state == State.Unavailable:
+                    return
+                opened = self.step()
+            time.sleep(self.door_time if opened else self.floor_time)
+
+
+class ElevatorBank:
+    """
+    Controller for a group of cars serving the same floors. Hall calls and
+    destination-dispatch requests go to the car with the shortest LOOK
+    estimate, with every stop already queued on that car costing `stop_penalty`
+    floors of travel.
+    """
+
+    def __init__(self,
+                 num_cars: int,
+                 num_floors: int,
+                 floor_time: float = 0.1,
+                 door_time: float = 0.1,
+                 stop_penalty: int = 2,
+                 verbose: bool = False):
+        self.num_floors = num_floors
+        self.stop_penalty = stop_penalty
+        self.cars = [Elevator(State.Idle, 0, num_floors, floor_time=floor_time, door_time=door_time,
+                              verbose=verbose) for _ in range(num_cars)]
+        self.threads: List[threading.Thread] = []
+
+    def cost(self, car: Elevator, floor: int, direction: Direction) -> int:
+        # One lock hold so the estimate and the stop count see the same state.
+        with car._wakeup:
+            return car.eta(floor, direction) + self.stop_penalty * car.pending.bit_count()
+
+    def best_car(self, floor: int, direction: Direction) -> Elevator:
+        available = [car for car in self.cars if car.state != State.Unavailable]
+        if not available:
+            raise RuntimeError("no elevator in service")
+        return min(available, key=lambda car: self.cost(car, floor, direction))
+
+    def call(self, floor: int, direction: Direction) -> Elevator:
+        """ Hall call from an up/down button panel. """
+        car = self.best_car(floor, direction)
+        car.send_request(Request(floor, RequestType.External, direction=direction))
+        return car
+
+    def request(self, src: int, dest: int) -> Elevator:
+        """ Destination dispatch: the rider enters `dest` on the panel at `src`. """
+        car = self.best_car(src, Direction.Up if dest > src else Direction.Down)
+        car.assign(src, dest)
+        return car
+
+    def start(self):
+        for car in self.cars:
+            thread = threading.Thread(target=car.dispatch, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def shutdown(self):
+        for car in self.cars:
+            car.state = State.Unavailable
+        for thread in self.threads:
+            thread.join()
+        self.threads.clear()
+
+
+def main():
+    bank = ElevatorBank(num_cars=4, num_floors=120, floor_time=0.005, door_time=0.02)
+    bank.start()
+    for src, dest in [(0, 97), (0, 45), (110, 3), (60, 61), (12, 0), (0, 119), (88, 20)]:
+        car = bank.request(src, dest)
+        print(f"{src:>3} -> {dest:>3}: car {bank.cars.index(car)}")
+    while any(car.pending for car in bank.cars):
+        time.sleep(0.05)
+    bank.shutdown()
+    print("Car floors:", [car.floor for car in bank.cars])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
 import collections
+import heapq
+import itertools
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
 
 
 class LRUCache:
@@ -19,3 +25,183 @@ class LRUCache:
         self.cache.move_to_end(key)
         if len(self.cache) > self.capacity:
             self.cache.popitem(last=False)
+
+
+class _Shard:
+    """
+    One independent LRU segment. Every entry is stored as
+    key -> (value, weight, expires_at) in an OrderedDict, oldest first.
+    Entries with a TTL are also in `expiries`, a heap by expiry time. Heap
+    items of keys since removed or re-put are skipped when they surface, and
+    the heap is rebuilt once they make up more than half of it.
+    """
+
+    def __init__(self):
+        self.cache = collections.OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.expiries = []  # (expires_at, tie breaker, key)
+        self._order = itertools.count()
+
+    def _insert(self, key, value, weight: int, expires_at: Optional[float]):
+        self.cache[key] = (value, weight, expires_at)
+        self.bytes += weight
+        if expires_at is None:
+            return
+        heapq.heappush(self.expiries, (expires_at, next(self._order), key))
+        if len(self.expiries) > 2 * len(self.cache) + 16:
+            self.expiries = [(expiry, next(self._order), k) for k, (_, _, expiry) in self.cache.items()
+                             if expiry is not None]
+            heapq.heapify(self.expiries)
+
+    def _remove(self, key) -> int:
+        _, weight, _ = self.cache.pop(key)
+        self.bytes -= weight
+        return weight
+
+    def _pop_oldest(self) -> int:
+        _, (_, weight, _) = self.cache.popitem(last=False)
+        self.bytes -= weight
+        return weight
+
+    def _evict(self, now: float) -> int:
+        """ Removes the entry that expired first, else the least recently used one; returns its weight. """
+        expiries = self.expiries
+        while expiries:
+            expires_at, _, key = expiries[0]
+            entry = self.cache.get(key)
+            if entry is None or entry[2] != expires_at:
+                heapq.heappop(expiries)
+                continue
+            if expires_at > now:
+                break
+            heapq.heappop(expiries)
+            return self._remove(key)
+        return self._pop_oldest()
+
+
+class ShardedLRUCache:
+    """
+    Thread-safe drop-in for LRUCache.
+
+    Keys are spread over `num_shards` independent OrderedDict segments by hash,
+    each guarded by its own lock, so threads touching different shards never
+    wait on each other. Capacity (entry count) and `max_bytes` (total weight)
+    are limits on the whole cache, tracked by two shared counters. An insert
+    that goes over either limit evicts least recently used entries from its
+    own shard first and only then from the others, one shard lock at a time.
+    A value is rejected only if it is heavier than `max_bytes` on its own.
+
+    Entries can carry a TTL (seconds). Expired entries are dropped lazily on
+    access, and when an insert goes over a limit each shard gives up its
+    expired entries before any live one, whatever their LRU position.
+    """
+
+    def __init__(self, capacity: int, num_shards: int = 16, max_bytes: Optional[int] = None,
+                 default_ttl: Optional[float] = None, weigher: Callable[[Any], int] = sys.getsizeof,
+                 clock: Callable[[], float] = time.monotonic):
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        num_shards = min(num_shards, max(capacity, 1))
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.weigher = weigher
+        self.clock = clock
+        self.shards = [_Shard() for _ in range(num_shards)]
+        # Entry count and total weight over all shards.
+        self._size = 0
+        self._bytes = 0
+        self._totals_lock = threading.Lock()
+
+    def _shard(self, key) -> _Shard:
+        return self.shards[hash(key) % len(self.shards)]
+
+    def _account(self, entries: int, weight: int):
+        with self._totals_lock:
+            self._size += entries
+            self._bytes += weight
+
+    def _over_limit(self) -> bool:
+        return self._size > self.capacity or (self.max_bytes is not None and self._bytes > self.max_bytes)
+
+    def _evict_elsewhere(self, start: int, now: float):
+        """ Evicts from the other shards, in turn, until the cache is back within its limits. """
+        for offset in range(1, len(self.shards)):
+            shard = self.shards[(start + offset) % len(self.shards)]
+            with shard.lock:
+                while shard.cache and self._over_limit():
+                    self._account(-1, -shard._evict(now))
+            if not self._over_limit():
+                return
+
+    def get(self, key: int) -> int:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.cache.get(key)
+            if entry is None:
+                return -1
+            value, _, expires_at = entry
+            if expires_at is not None and expires_at <= self.clock():
+                self._account(-1, -shard._remove(key))
+                return -1
+            shard.cache.move_to_end(key)
+            return value
+
+    def put(self, key: int, value: int, ttl: Optional[float] = None) -> None:
+        if self.capacity <= 0:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        now = self.clock()
+        expires_at = None if ttl is None else now + ttl
+        weight = self.weigher(value) if self.max_bytes is not None else 0
+        index = hash(key) % len(self.shards)
+        shard = self.shards[index]
+        with shard.lock:
+            if key in shard.cache:
+                self._account(-1, -shard._remove(key))
+            if self.max_bytes is not None and weight > self.max_bytes:
+                # Would flush the whole cache and still not fit.
+                return
+            shard._insert(key, value, weight, expires_at)
+            self._account(1, weight)
+            while len(shard.cache) > 1 and self._over_limit():
+                self._account(-1, -shard._evict(now))
+        if self._over_limit():
+            self._evict_elsewhere(index, now)
+
+    def delete(self, key) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.cache:
+                self._account(-1, -shard._remove(key))
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+
+def main():
+    cache = ShardedLRUCache(capacity=4, num_shards=2, default_ttl=60)
+    for i in range(6):
+        cache.put(i, i * i)
+    print([cache.get(i) for i in range(6)])
+
+    def worker(offset):
+        for i in range(10000):
+            cache.put(offset + i % 100, i)
+            cache.get(offset + i % 50)
+
+    threads = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"Entries after concurrent load: {len(cache)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -102,8 +102,15 @@ Class Diagram
 +------------------+
 
 """
+import contextlib
+import heapq
+import io
+import itertools
 import random
-from typing import List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 import datetime
 from enum import Enum
 
@@ -125,11 +132,12 @@ class Vehicle:
 
 
 class Ticket:
-    ticket_counter = 0
+    # next() on itertools.count is atomic, unlike `counter += 1`, so gates
+    # issuing tickets concurrently never share a ticket number.
+    ticket_counter = itertools.count(1)
 
     def __init__(self, vehicle: Vehicle, slot_number: int):
-        Ticket.ticket_counter += 1
-        self.ticket_number = Ticket.ticket_counter
+        self.ticket_number = next(Ticket.ticket_counter)
         self.vehicle = vehicle
         self.slot_number = slot_number
         self.entry_time = datetime.datetime.now()
@@ -174,15 +182,19 @@ class ParkingSlot:
         ParkingSlot.parking_counter += 1
         self.slot_number = ParkingSlot.parking_counter
         self.type = type_
+        self.level = None
         self.is_occupied = False
         self.vehicle = None
+        self.ticket_number = None  # ticket of the current occupant
 
-    def park(self, vehicle: Vehicle):
+    def park(self, vehicle: Vehicle, ticket_number: Optional[int] = None):
         self.vehicle = vehicle
+        self.ticket_number = ticket_number
         self.is_occupied = True
 
     def un_park(self):
         self.vehicle = None
+        self.ticket_number = None
         self.is_occupied = False
 
     def is_available(self):
@@ -235,16 +247,37 @@ class ExitGate(Gate):
 
 
 class ParkingLot:
+    """
+    Free slots are kept in one min-heap of slot numbers per level and vehicle
+    type, so parking takes the nearest free slot of the right type without
+    scanning. `slots` maps slot numbers to slots for unparking by ticket, and
+    the occupancy counters answer status queries in O(1).
+
+    Every (level, vehicle type) heap has its own lock, which also guards the
+    matching occupancy counter. Gates parking different vehicle types, or on
+    different levels, never wait on each other, and a slot can only be handed
+    out once. Adding levels and slots is expected to happen before the gates
+    open and is not synchronised.
+    """
 
     def __init__(self, levels: int):
-        self.levels = levels
-        self.parking_slots = [[]]
-        self.total_slots = sum(len(slots) for slots in self.parking_slots)
+        self.levels = 0
+        self.parking_slots = []
+        self.total_slots = 0
         self.entry_gates = []
         self.exit_gates = []
+        self.slots: Dict[int, ParkingSlot] = {}
+        self.free_slots: List[Dict[VehicleType, List[int]]] = []
+        self.occupied: List[Dict[VehicleType, int]] = []
+        self.locks: List[Dict[VehicleType, threading.Lock]] = []
+        for _ in range(levels):
+            self.add_level()
 
     def add_level(self):
         self.parking_slots.append([])
+        self.free_slots.append({vehicle_type: [] for vehicle_type in VehicleType})
+        self.occupied.append({vehicle_type: 0 for vehicle_type in VehicleType})
+        self.locks.append({vehicle_type: threading.Lock() for vehicle_type in VehicleType})
         self.levels += 1
 
     def add_parking_slot(self, level: int, slot: ParkingSlot):
@@ -253,40 +286,69 @@ class ParkingLot:
             self.total_slots += 1
         except:
             raise Exception("Invalid level or slot")
+        slot.level = level
+        self.slots[slot.slot_number] = slot
+        if slot.is_available():
+            heapq.heappush(self.free_slots[level][slot.type], slot.slot_number)
+        else:
+            self.occupied[level][slot.type] += 1
 
     def add_entry_gate(self):
-        pass
+        gate = EntryGate(len(self.entry_gates) + 1)
+        self.entry_gates.append(gate)
+        return gate
 
     def add_exit_gate(self):
-        pass
+        gate = ExitGate(len(self.exit_gates) + 1)
+        self.exit_gates.append(gate)
+        return gate
 
     def park_vehicle(self, vehicle: Vehicle):
-        for level in self.parking_slots:
-            for slot in level:
-                if slot.is_available():
-                    slot.park(vehicle)
-                    return Ticket(vehicle, slot.get_slot_number())
+        vehicle_type = vehicle.vehicle_type
+        for level, free_slots in enumerate(self.free_slots):
+            free = free_slots[vehicle_type]
+            if not free:  # unlocked peek, re-checked under the lock
+                continue
+            with self.locks[level][vehicle_type]:
+                if not free:
+                    continue
+                slot = self.slots[heapq.heappop(free)]
+                ticket = Ticket(vehicle, slot.get_slot_number())
+                slot.park(vehicle, ticket.ticket_number)
+                self.occupied[level][vehicle_type] += 1
+            return ticket
         print("Parking lot is full")
         return None
 
     def unpark_vehicle(self, ticket: Ticket):
-        for level in self.parking_slots:
-            for slot in level:
-                if slot.slot_number == ticket.slot_number:
-                    slot.unpark()
-                    exit_gate = self.exit_gates[random.randint(0, len(self.exit_gates) - 1)]
-                    ticket.close_ticket()
-                    if ticket.get_payment_status():
-                        exit_gate.open()
-                        return
-                    else:
-                        raise Exception("Complete Payment First")
+        slot = self.slots.get(ticket.slot_number)
+        if slot is None:
+            raise Exception("Invalid ticket")
+        with self.locks[slot.level][slot.type]:
+            # A stale ticket for a slot that has since been re-let must not evict the new occupant.
+            if not slot.is_occupied or slot.ticket_number != ticket.ticket_number:
+                raise Exception("Invalid ticket")
+            slot.un_park()
+            self.occupied[slot.level][slot.type] -= 1
+            heapq.heappush(self.free_slots[slot.level][slot.type], slot.slot_number)
+        ticket.close_ticket()
+        if not ticket.get_payment_status():
+            raise Exception("Complete Payment First")
+        if self.exit_gates:
+            exit_gate = self.exit_gates[random.randint(0, len(self.exit_gates) - 1)]
+            exit_gate.open_gate()
+
+    def available_slots(self, level: Optional[int] = None, vehicle_type: Optional[VehicleType] = None) -> int:
+        levels = self.free_slots if level is None else [self.free_slots[level]]
+        if vehicle_type is None:
+            return sum(len(free) for free_slots in levels for free in free_slots.values())
+        return sum(len(free_slots[vehicle_type]) for free_slots in levels)
 
     def get_status(self) -> None:
         for i, level in enumerate(self.parking_slots):
-            print(f"Level {i + 1}:")
-            for slot in level:
-                print(f" Slot {slot.slot_number}: {'Occupied' if slot.is_occupied else 'Available'}")
+            free = ", ".join(f"{vehicle_type.value}: {len(self.free_slots[i][vehicle_type])}"
+                             for vehicle_type in VehicleType)
+            print(f"Level {i + 1}: {sum(self.occupied[i].values())}/{len(level)} occupied ({free} available)")
 
 
 class ParkingDisplayBoard:
@@ -296,24 +358,75 @@ class ParkingDisplayBoard:
 
     def display_status(self):
         self.parking_lot.get_status()
+        print(f"Total available: {self.parking_lot.available_slots()}/{self.parking_lot.total_slots}")
+
+
+def simulate_gates(levels: int = 10, slots_per_level: int = 500, gates: int = 8, cars: int = 20000,
+                   seed: int = 0):
+    """
+    Drives `gates` entry/exit gates from a thread pool. Every car parks, keeps
+    the slot for a moment and leaves; reports cars/sec and the latency
+    percentiles of slot allocation, and checks that no slot was double-booked.
+    """
+    rng = random.Random(seed)
+    types = list(VehicleType)
+    parking_lot = ParkingLot(levels)
+    for level in range(levels):
+        for i in range(slots_per_level):
+            parking_lot.add_parking_slot(level, ParkingSlot(types[i % len(types)]))
+    for _ in range(gates):
+        parking_lot.add_entry_gate()
+        parking_lot.add_exit_gate()
+    vehicles = [Vehicle(f"KA-{i:06d}", rng.choice(types)) for i in range(cars)]
+
+    latencies = []
+    double_booked = []
+
+    def drive_through(vehicle: Vehicle):
+        started = time.perf_counter_ns()
+        ticket = parking_lot.park_vehicle(vehicle)
+        latencies.append(time.perf_counter_ns() - started)
+        if ticket is None:
+            return
+        if parking_lot.slots[ticket.slot_number].vehicle is not vehicle:
+            double_booked.append(ticket.slot_number)
+        time.sleep(0)
+        parking_lot.unpark_vehicle(ticket)
+
+    # Fare receipts and gate messages are printed per car, keep them out of the report.
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=gates) as pool:
+            list(pool.map(drive_through, vehicles))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] / 1000
+    p99 = latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] / 1000
+    print(f"{cars} cars through {gates} gates in {elapsed:.2f}s: {cars / elapsed:,.0f} cars/s, "
+          f"allocation p50 {p50:.1f} us, p99 {p99:.1f} us, double-booked: {len(double_booked)}")
 
 
 def main():
     # Create a parking lot with 3 levels, each with 5 slots
-    parking_lot = ParkingLot(3, 5)
+    parking_lot = ParkingLot(3)
+    for level in range(3):
+        for vehicle_type in (VehicleType.TwoWheeler, VehicleType.FourWheeler,
+                             VehicleType.FourWheeler, VehicleType.FourWheeler, VehicleType.ThreeWheeler):
+            parking_lot.add_parking_slot(level, ParkingSlot(vehicle_type))
 
     # Create a display board for the parking lot
     display_board = ParkingDisplayBoard(parking_lot)
 
     # Create an entrance gate and an exit gate
-    entrance_gate = EntryGate(1)
-    exit_gate = ExitGate(1)
+    entrance_gate = parking_lot.add_entry_gate()
+    exit_gate = parking_lot.add_exit_gate()
 
     # Display the initial status of the parking lot
     display_board.display_status()
 
     # Open the entrance gate and park a vehicle
-    vehicle1 = Vehicle("ABC123", "Car")
+    vehicle1 = Vehicle("ABC123", VehicleType.FourWheeler)
     entrance_gate.open_gate()
     ticket1 = parking_lot.park_vehicle(vehicle1)
     entrance_gate.close_gate()
@@ -329,7 +442,7 @@ def main():
     # Display the status of the parking lot after unparking the vehicle
     display_board.display_status()
 
-    # TODO: Handle entry and exit gates
+    simulate_gates()
 
 
 if __name__ == "__main__":
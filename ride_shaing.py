@@ -1,6 +1,10 @@
+import heapq
+import math
+import random
+import time
 from collections import namedtuple
 from enum import Enum, auto, StrEnum
-from typing import List, Union
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 
 
 def generate_id():
@@ -28,8 +32,8 @@ class Gender(StrEnum):
 
 
 class Strategy(Enum):
-    MOST_VACANT: auto()
-    PREFERRED_VEHICLE: auto()
+    MOST_VACANT = auto()
+    PREFERRED_VEHICLE = auto()
 
 
 Coordinates = namedtuple("Coordinates", ["latitude", "longitude"])
@@ -37,6 +41,60 @@ Ride = namedtuple("Ride", ["id", "driver", "vehicle", "origin", "destination", "
 DriverTuple = namedtuple("Driver", ["id", "name", "age", "gender", "vehicles"])
 PassengerTuple = namedtuple("Passenger", ["id", "name", "age", "gender"])
 
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def distance_km(a: Coordinates, b: Coordinates) -> float:
+    """ Great-circle (haversine) distance. """
+    lat1, lon1, lat2, lon2 = map(math.radians, (a.latitude, a.longitude, b.latitude, b.longitude))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class GridIndex:
+    """
+    Buckets points into a fixed grid of `cell_degrees` x `cell_degrees` cells
+    (a geohash grid without the string encoding). A radius query only looks at
+    the cells overlapping the circle's bounding box, so its cost depends on how
+    many points are nearby rather than on how many are indexed.
+    """
+
+    def __init__(self, cell_degrees: float = 0.01):
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+
+    def cell(self, point: Coordinates) -> Tuple[int, int]:
+        return (math.floor(point.latitude / self.cell_degrees),
+                math.floor(point.longitude / self.cell_degrees))
+
+    def add(self, item_id: int, point: Coordinates):
+        self.cells.setdefault(self.cell(point), set()).add(item_id)
+
+    def remove(self, item_id: int, point: Coordinates):
+        cell = self.cell(point)
+        items = self.cells.get(cell)
+        if items is not None:
+            items.discard(item_id)
+            if not items:
+                del self.cells[cell]
+
+    def cells_near(self, point: Coordinates, radius_km: float) -> List[Tuple[int, int]]:
+        """ Every cell overlapping the bounding box of the circle. """
+        lat_delta = radius_km / KM_PER_DEGREE
+        lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(point.latitude)), 1e-6))
+        lat_lo, lon_lo = self.cell(Coordinates(point.latitude - lat_delta, point.longitude - lon_delta))
+        lat_hi, lon_hi = self.cell(Coordinates(point.latitude + lat_delta, point.longitude + lon_delta))
+        return [(lat, lon) for lat in range(lat_lo, lat_hi + 1) for lon in range(lon_lo, lon_hi + 1)]
+
+    def nearby(self, point: Coordinates, radius_km: float) -> Iterator[int]:
+        """ Ids in the cells around the circle; callers filter by exact distance. """
+        cells = self.cells
+        for cell in self.cells_near(point, radius_km):
+            items = cells.get(cell)
+            if items:
+                yield from items
+
 
 class Driver:
 
@@ -68,88 +126,274 @@ class Passenger:
         passengers.add(self.passenger)
 
     def find_rides(self, source: Coordinates, destination: Coordinates,
-                   seats: int, selection_strategy: Strategy):
-        # Pick all rides with same source
-        # If they have same destinations return them
-        # If all the trips have different destinations,
-        # find the ones which have source as the destinations that we have
-        pass
+                   seats: int, selection_strategy: Strategy, preferred_vehicle: Optional[str] = None,
+                   radius_km: float = 1.0) -> List[Ride]:
+        """
+        Rides starting within `radius_km` of `source` and ending within
+        `radius_km` of `destination` that still have `seats` free, best first:
+        most free seats for MOST_VACANT, only `preferred_vehicle` rides,
+        closest pickup first, for PREFERRED_VEHICLE.
+        """
+        rides = Rides()
+        candidates = rides.near(source, destination, radius_km)
+        candidates = [ride for ride in candidates if ride.available_seats >= seats]
+        if selection_strategy == Strategy.PREFERRED_VEHICLE:
+            candidates = [ride for ride in candidates if ride.vehicle == preferred_vehicle]
+            candidates.sort(key=lambda ride: distance_km(ride.origin, source))
+        else:
+            candidates.sort(key=lambda ride: (-ride.available_seats, distance_km(ride.origin, source)))
+        return candidates
+
+    def find_connecting_rides(self, source: Coordinates, destination: Coordinates, seats: int,
+                              max_hops: int = 3, radius_km: float = 1.0) -> List[Ride]:
+        """
+        For when no direct ride exists: the chain of at most `max_hops` rides,
+        each with `seats` free, where every ride starts within the transfer
+        distance of where the previous one ends. The first ride starts within
+        `radius_km` of `destination`, and the chain minimises the kilometres
+        travelled up to the end of the last ride: the walk to the first ride,
+        the rides and the walks between them. The walk from the last ride to
+        `destination` is not counted.
+
+        A* over the rides graph (rides are edges between coordinates,
+        `Rides.connections` the precomputed transfers between them). The
+        heuristic is the straight-line distance to the edge of the
+        `radius_km` circle around `destination`, never more than the rest of
+        any chain, so the first chain reaching the circle is the cheapest. A
+        ride may be revisited only with fewer hops used, which keeps the hop
+        bound exact.
+
+        :return: The rides in travel order, empty if there is no such chain.
+        """
+        def remaining(point: Coordinates) -> float:
+            return max(0.0, distance_km(point, destination) - radius_km)
+
+        rides = Rides()
+        frontier = []
+        for ride in rides.starting_near(source, radius_km):
+            if ride.available_seats >= seats:
+                cost = distance_km(source, ride.origin) + distance_km(ride.origin, ride.destination)
+                heapq.heappush(frontier, (cost + remaining(ride.destination), 1, cost, ride.id))
+        # (ride id, hops) -> (cost so far, previous state), for the cheapest way found there
+        labels: Dict[Tuple[int, int], Tuple[float, Optional[Tuple[int, int]]]] = {}
+        for _, hops, cost, ride_id in frontier:
+            labels[ride_id, hops] = (cost, None)
+        settled_hops: Dict[int, int] = {}
+
+        while frontier:
+            _, hops, cost, ride_id = heapq.heappop(frontier)
+            if settled_hops.get(ride_id, max_hops + 1) <= hops:
+                continue
+            settled_hops[ride_id] = hops
+            ride = rides.rides[ride_id]
+            to_go = distance_km(ride.destination, destination)
+            if to_go <= radius_km:
+                chain, state = [], (ride_id, hops)
+                while state is not None:
+                    chain.append(rides.rides[state[0]])
+                    state = labels[state][1]
+                return chain[::-1]
+            if hops == max_hops:
+                continue
+            for next_id in rides.connections[ride_id]:
+                if settled_hops.get(next_id, max_hops + 1) <= hops + 1:
+                    continue
+                following = rides.rides[next_id]
+                if following.available_seats < seats:
+                    continue
+                next_cost = (cost + distance_km(ride.destination, following.origin) +
+                             distance_km(following.origin, following.destination))
+                state = (next_id, hops + 1)
+                if state not in labels or next_cost < labels[state][0]:
+                    labels[state] = (next_cost, (ride_id, hops))
+                    heapq.heappush(frontier, (next_cost + remaining(following.destination), hops + 1, next_cost,
+                                              next_id))
+        return []
 
 
 class Drivers(Singleton):
 
     def __init__(self):
-        self.drivers = []
+        if hasattr(self, "drivers"):  # Singleton: __init__ runs on every Drivers() call
+            return
+        self.drivers: Dict[int, DriverTuple] = {}
 
     def add(self, driver: DriverTuple) -> int:
-        self.drivers.append(driver)
+        self.drivers[driver.id] = driver
         return driver.id
 
     def delete(self, driver_id: int) -> bool:
-        index = -1
-        for i, driver in enumerate(self.drivers):
-            if driver.id == driver_id:
-                index = i
-                break
-        if index != -1:
-            self.drivers.pop(index)
-            return True
-        return False
+        return self.drivers.pop(driver_id, None) is not None
 
     def get(self, driver_id: int) -> Union[DriverTuple, None]:
-        res = list(filter(lambda x: x.id == driver_id, self.drivers))
-        return res if res else None
+        return self.drivers.get(driver_id)
 
     def update(self, d: DriverTuple) -> bool:
-        for i, driver in enumerate(self.drivers):
-            if driver.id == d.id:
-                driver.vehicles = d.vehicles
-                return True
+        if d.id in self.drivers:
+            self.drivers[d.id] = d
+            return True
         return False
 
 
 class Passengers(Singleton):
 
     def __init__(self):
-        self.passengers = []
+        if hasattr(self, "passengers"):
+            return
+        self.passengers: Dict[int, PassengerTuple] = {}
 
     def add(self, passenger: PassengerTuple) -> int:
-        self.passengers.append(passenger)
+        self.passengers[passenger.id] = passenger
         return passenger.id
 
     def delete(self, passenger_id: int) -> bool:
-        index = -1
-        for i, passenger in enumerate(self.passengers):
-            if passenger.id == passenger_id:
-                index = i
-                break
-        if index != -1:
-            self.passengers.pop(index)
-            return True
-        return False
+        return self.passengers.pop(passenger_id, None) is not None
 
     def get(self, passenger_id: int) -> Union[PassengerTuple, None]:
-        res = list(filter(lambda x: x.id == passenger_id, self.passengers))
-        return res if res else None
+        return self.passengers.get(passenger_id)
 
 
 class Rides(Singleton):
+    """
+    Active rides by id, plus two grid indexes: one over ride origins, and one
+    keyed by the (origin cell, destination cell) pair. A route query only
+    visits the cell pairs around both endpoints and gets back rides that
+    match both ends, instead of intersecting two large candidate sets. The
+    pairs grow with the fourth power of the radius, so wide queries that
+    would probe more pairs than there are rides starting nearby scan those
+    rides instead.
+
+    For multi-hop searches it also keeps the transfer graph: `connections`
+    maps a ride to the rides starting within `TRANSFER_KM` of its
+    destination, `feeders` is the reverse. Both are updated as rides are
+    added and deleted, using finer grids over origins and destinations, so a
+    new ride costs two small neighbourhood lookups rather than a rebuild.
+    """
+
+    TRANSFER_KM = 0.3
 
     def __init__(self):
-        self.rides = []
+        if hasattr(self, "rides"):
+            return
+        self.rides: Dict[int, Ride] = {}
+        self.origins = GridIndex()
+        self.routes: Dict[Tuple[Tuple[int, int], Tuple[int, int]], Set[int]] = {}
+        self.pickups = GridIndex(cell_degrees=self.TRANSFER_KM / KM_PER_DEGREE)
+        self.dropoffs = GridIndex(cell_degrees=self.TRANSFER_KM / KM_PER_DEGREE)
+        self.connections: Dict[int, List[int]] = {}
+        self.feeders: Dict[int, List[int]] = {}
+
+    def _route(self, ride: Ride):
+        return self.origins.cell(ride.origin), self.origins.cell(ride.destination)
+
+    def _within_transfer(self, index: GridIndex, point: Coordinates, end: str) -> List[int]:
+        rides = self.rides
+        return [ride_id for ride_id in index.nearby(point, self.TRANSFER_KM)
+                if distance_km(getattr(rides[ride_id], end), point) <= self.TRANSFER_KM]
 
     def add(self, ride: Ride):
-        self.rides.append(ride)
+        self.rides[ride.id] = ride
+        self.origins.add(ride.id, ride.origin)
+        self.routes.setdefault(self._route(ride), set()).add(ride.id)
+
+        onward = self._within_transfer(self.pickups, ride.destination, "origin")
+        inbound = self._within_transfer(self.dropoffs, ride.origin, "destination")
+        for ride_id in onward:
+            self.feeders[ride_id].append(ride.id)
+        for ride_id in inbound:
+            self.connections[ride_id].append(ride.id)
+        self.connections[ride.id] = onward
+        self.feeders[ride.id] = inbound
+        self.pickups.add(ride.id, ride.origin)
+        self.dropoffs.add(ride.id, ride.destination)
 
     def delete(self, ride_id: int) -> bool:
-        target = -1
-        for index, ride in enumerate(self.rides):
-            if ride.id_ == ride_id:
-                break
-        if target != -1:
-            self.rides.pop(target)
-            return True
-        return False
+        ride = self.rides.pop(ride_id, None)
+        if ride is None:
+            return False
+        self.origins.remove(ride_id, ride.origin)
+        route = self._route(ride)
+        self.routes[route].discard(ride_id)
+        if not self.routes[route]:
+            del self.routes[route]
+
+        self.pickups.remove(ride_id, ride.origin)
+        self.dropoffs.remove(ride_id, ride.destination)
+        for other in self.connections.pop(ride_id):
+            self.feeders[other].remove(ride_id)
+        for other in self.feeders.pop(ride_id):
+            self.connections[other].remove(ride_id)
+        return True
+
+    def get(self, ride_id: int) -> Union[Ride, None]:
+        return self.rides.get(ride_id)
+
+    def starting_near(self, point: Coordinates, radius_km: float) -> List[Ride]:
+        rides = self.rides
+        return [rides[ride_id] for ride_id in self.origins.nearby(point, radius_km)
+                if distance_km(rides[ride_id].origin, point) <= radius_km]
+
+    def near(self, origin: Coordinates, destination: Coordinates, radius_km: float) -> List[Ride]:
+        """ Rides whose origin and destination are both within `radius_km` of the given points. """
+        origin_cells = self.origins.cells_near(origin, radius_km)
+        destination_cells = self.origins.cells_near(destination, radius_km)
+        cells = self.origins.cells
+        candidates = sum(len(cells.get(cell, ())) for cell in origin_cells)
+        if len(origin_cells) * len(destination_cells) > len(origin_cells) + candidates:
+            return [ride for ride in self.starting_near(origin, radius_km)
+                    if distance_km(ride.destination, destination) <= radius_km]
+        routes, rides = self.routes, self.rides
+        result = []
+        for origin_cell in origin_cells:
+            for destination_cell in destination_cells:
+                ride_ids = routes.get((origin_cell, destination_cell))
+                if not ride_ids:
+                    continue
+                for ride_id in ride_ids:
+                    ride = rides[ride_id]
+                    if (distance_km(ride.origin, origin) <= radius_km and
+                            distance_km(ride.destination, destination) <= radius_km):
+                        result.append(ride)
+        return result
+
+
+def benchmark(ride_counts=(1000, 10000, 100000), queries: int = 1000, seed: int = 0):
+    """
+    find_rides and find_connecting_rides latency as the number of active
+    rides grows, over a ~50 km wide city.
+    """
+    rng = random.Random(seed)
+
+    def point():
+        return Coordinates(12.75 + rng.random() * 0.45, 77.4 + rng.random() * 0.45)
+
+    driver = Driver("Benchmark", 30, Gender.MALE, ["Swift", "Baleno", "Activa"])
+    passenger = Passenger("Rider", 25, Gender.FEMALE)
+    rides = Rides()
+    for count in ride_counts:
+        while len(rides.rides) < count:
+            driver.offer_ride(rng.choice(driver.driver.vehicles), point(), point(), rng.randint(1, 4))
+        started = time.perf_counter()
+        found = 0
+        for _ in range(queries):
+            found += len(passenger.find_rides(point(), point(), 1, Strategy.MOST_VACANT, radius_km=2.0))
+        elapsed = time.perf_counter() - started
+        print(f"{count:>7} rides: {elapsed / queries * 1e6:>8.1f} us per find_rides ({found / queries:.2f} matches)")
+
+        started = time.perf_counter()
+        found = hops = 0
+        for _ in range(queries):
+            chain = passenger.find_connecting_rides(point(), point(), 1, max_hops=3, radius_km=2.0)
+            found += bool(chain)
+            hops += len(chain)
+        elapsed = time.perf_counter() - started
+        print(f"{count:>7} rides: {elapsed / queries * 1e3:>8.2f} ms per find_connecting_rides "
+              f"({found / queries:.0%} routed, {hops / max(found, 1):.2f} rides per route)")
+
+
+if __name__ == "__main__":
+    benchmark()
+
 
 # class VehicleDb:
 #
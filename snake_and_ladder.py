@@ -1,7 +1,18 @@
+import argparse
 import random
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # only simulate_vectorized needs it
+    np = None
+
+BOARD_SIZE = 100
+DIE_FACES = 6
 
 
 class Color(Enum):
@@ -49,7 +60,7 @@ class Player:
 
     def move(self, number: int):
         new_position = self.position + number
-        if new_position <= 100:
+        if new_position <= BOARD_SIZE:
             self.position = new_position
 
     def __str__(self) -> str:
@@ -71,18 +82,39 @@ class Board:
     def __init__(self, snakes: List[Snake], ladders: List[Ladder]):
         self.snakes = snakes
         self.ladders = ladders
+        self._jumps: Optional[List[int]] = None
 
     def add_ladders(self, ladders: List[Ladder]):
         self.ladders.extend(ladders)
+        self._jumps = None
 
     def add_snakes(self, snakes: List[Snake]):
         self.snakes.extend(snakes)
+        self._jumps = None
+
+    @property
+    def jumps(self) -> List[int]:
+        """
+        jumps[square] is where a counter landing on `square` ends up: the
+        other end of a snake or ladder, else the square itself. Built once per
+        layout, so resolving a move is one list lookup instead of a scan over
+        every snake and ladder. A snake wins over a ladder on the same square.
+        """
+        if self._jumps is None:
+            jumps = list(range(BOARD_SIZE + 1))
+            for ladder in self.ladders:
+                jumps[ladder.start] = ladder.end
+            for snake in self.snakes:
+                jumps[snake.start] = snake.end
+            self._jumps = jumps
+        return self._jumps
 
 
 class Game:
 
-    def __init__(self, board: Board, die: Die, players: List[Player]):
+    def __init__(self, board: Board, die: Die, players: List[Player], verbose: bool = True):
         self.die = die
+        self.verbose = verbose
         self.board = board
         if len(players) != len(set([player.color.value for player in players])):
             raise Exception("2 players cannot have same same color")
@@ -97,38 +129,244 @@ class Game:
                 number = player.roll_dice(self.die)
                 player.move(number)
                 self._update_position(player)
-                if player.position == 100:
+                if player.position == BOARD_SIZE:
                     self.winner = player
                     return
-                print(f"{player.color}: {number} -> {player.position}")
-                time.sleep(0.5)
+                if self.verbose:
+                    print(f"{player.color}: {number} -> {player.position}")
+                    time.sleep(0.5)
 
     def _update_position(self, player: Player):
-        for snake in self.board.snakes:
-            if player.position == snake.start:
-                player.position = snake.end
-                print(f"Snake: {player.color}: {snake.start} -> {snake.end}")
-                time.sleep(1)
-                return
-        for ladder in self.board.ladders:
-            if player.position == ladder.start:
-                player.position = ladder.end
-                print(f"Ladder: {player.color}: {ladder.start} -> {ladder.end}")
-                time.sleep(1)
-                return
+        start = player.position
+        end = self.board.jumps[start]
+        if end == start:
+            return
+        player.position = end
+        if self.verbose:
+            print(f"{'Snake' if end < start else 'Ladder'}: {player.color}: {start} -> {end}")
+            time.sleep(1)
 
     def get_winner(self):
         return self.winner
 
 
-def main():
+def _play_games(task: Tuple[List[int], int, int, str]) -> Tuple[List[int], Dict[int, int]]:
+    """ Plays `games` silent games; returns wins per seat and a histogram of rounds played. """
+    jumps, num_players, games, seed = task
+    random_ = random.Random(seed).random
+    wins = [0] * num_players
+    lengths: Dict[int, int] = {}
+    seats = range(num_players)
+    for _ in range(games):
+        positions = [0] * num_players
+        rounds = 0
+        winner = None
+        while winner is None:
+            rounds += 1
+            for seat in seats:
+                square = positions[seat] + int(random_() * DIE_FACES) + 1
+                if square <= BOARD_SIZE:
+                    square = jumps[square]
+                    if square == BOARD_SIZE:
+                        winner = seat
+                        break
+                    positions[seat] = square
+        wins[winner] += 1
+        lengths[rounds] = lengths.get(rounds, 0) + 1
+    return wins, lengths
+
+
+def simulate(board: Board, num_players: int = 2, games: int = 1000000, workers: Optional[int] = None,
+             seed: int = 0, chunk_size: int = 20000) -> dict:
+    """
+    Monte Carlo over many headless games, split into chunks over a process
+    pool (in this process when `workers` is 0). Every chunk gets its own
+    generator seeded from (`seed`, chunk number), so results do not depend
+    on the number of workers.
+
+    :return: win probability per seat (seat 0 moves first) and the
+             distribution of game length in rounds.
+    """
+    jumps = board.jumps
+    tasks = [(jumps, num_players, min(chunk_size, games - start), f"{seed}:{start // chunk_size}")
+             for start in range(0, games, chunk_size)]
+    if workers == 0:
+        results = map(_play_games, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_play_games, tasks))
+    wins = [0] * num_players
+    lengths = Counter()
+    for chunk_wins, chunk_lengths in results:
+        wins = [total + won for total, won in zip(wins, chunk_wins)]
+        lengths.update(chunk_lengths)
+    return {
+        "games": games,
+        "win_probability": [won / games for won in wins],
+        "mean_length": sum(rounds * count for rounds, count in lengths.items()) / games,
+        "lengths": dict(sorted(lengths.items())),
+    }
+
+
+def simulate_vectorized(board: Board, num_players: int = 2, games: int = 1000000, seed: int = 0,
+                        batch_size: int = 200000) -> dict:
+    """
+    Same statistics as `simulate`, but plays a whole batch of games in
+    lockstep with NumPy: one array of rolls per seat per round, the jump
+    table applied by fancy indexing, and finished games dropped from the
+    arrays as they end. The Python loop runs once per seat per round
+    rather than once per move.
+    """
+    if np is None:
+        raise ImportError("simulate_vectorized needs numpy")
+    # Pad the table past the last square so an overshooting roll can still be looked up.
+    jumps = np.array(board.jumps + [0] * DIE_FACES, dtype=np.int16)
+    rng = np.random.default_rng(seed)
+    wins = np.zeros(num_players, dtype=np.int64)
+    lengths = np.zeros(1, dtype=np.int64)
+    for start in range(0, games, batch_size):
+        positions = np.zeros((min(batch_size, games - start), num_players), dtype=np.int16)
+        rounds = 0
+        while len(positions):
+            rounds += 1
+            finished = np.zeros(num_players, dtype=np.int64)
+            for seat in range(num_players):
+                current = positions[:, seat]
+                square = current + rng.integers(1, DIE_FACES + 1, size=len(current), dtype=np.int16)
+                square = np.where(square > BOARD_SIZE, current, jumps[square])
+                positions[:, seat] = square
+                won = square == BOARD_SIZE
+                finished[seat] = np.count_nonzero(won)
+                if finished[seat]:
+                    positions = positions[~won]
+            wins += finished
+            if rounds >= len(lengths):
+                lengths = np.resize(lengths, 2 * rounds)
+                lengths[rounds:] = 0
+            lengths[rounds] += finished.sum()
+    return {
+        "games": games,
+        "win_probability": (wins / games).tolist(),
+        "mean_length": float(np.arange(len(lengths)) @ lengths) / games,
+        "lengths": {rounds: int(count) for rounds, count in enumerate(lengths) if count},
+    }
+
+
+def finish_distribution(jumps: List[int], tolerance: float = 1e-12, max_turns: int = 100000) -> List[float]:
+    """
+    Exact Markov chain for one counter: element t is the probability that it
+    first reaches the last square on its t-th roll. Stops once less than
+    `tolerance` of the probability mass is still on the board.
+    """
+    on_board = [0.0] * BOARD_SIZE
+    on_board[0] = 1.0
+    # Overshooting the last square means staying put, as in Player.move.
+    moves = [[jumps[square + face] if square + face <= BOARD_SIZE else square
+              for face in range(1, DIE_FACES + 1)] for square in range(BOARD_SIZE)]
+    finished = [0.0]
+    remaining = 1.0
+    while remaining > tolerance and len(finished) <= max_turns:
+        following = [0.0] * (BOARD_SIZE + 1)
+        for square, probability in enumerate(on_board):
+            if probability:
+                share = probability / DIE_FACES
+                for target in moves[square]:
+                    following[target] += share
+        finished.append(following[BOARD_SIZE])
+        on_board = following[:BOARD_SIZE]
+        remaining -= following[BOARD_SIZE]
+    return finished
+
+
+def exact_statistics(board: Board, num_players: int = 2) -> dict:
+    """
+    Players never interact, so the game follows from one counter's finish
+    distribution f and its survival S(t) = P(not finished after t rolls):
+    seat k wins on round t when it finishes then, the seats before it have
+    not finished by round t and the seats after it not by round t - 1.
+    """
+    finish = finish_distribution(board.jumps)
+    survival = [1.0]
+    for probability in finish[1:]:
+        survival.append(survival[-1] - probability)
+    wins = [sum(finish[t] * survival[t] ** seat * survival[t - 1] ** (num_players - 1 - seat)
+                for t in range(1, len(finish)))
+            for seat in range(num_players)]
+    # Rounds played: P(length > t) = S(t) ** num_players
+    mean_length = sum(remaining ** num_players for remaining in survival)
+    return {"win_probability": wins, "mean_length": mean_length}
+
+
+def default_board() -> Board:
+    snakes = [Snake(s, e) for s, e in zip([34, 40, 56, 78, 90], [12, 23, 17, 42, 8])]
+    ladders = [Ladder(s, e) for s, e in zip([3, 13, 55, 75, 66], [45, 33, 99, 81, 88])]
+    return Board(snakes, ladders)
+
+
+def analyse(games: int, num_players: int, workers: Optional[int], vectorized: bool = False):
+    board = default_board()
+    started = time.perf_counter()
+    if vectorized:
+        simulated = simulate_vectorized(board, num_players, games)
+    else:
+        simulated = simulate(board, num_players, games, workers)
+    elapsed = time.perf_counter() - started
+    exact = exact_statistics(board, num_players)
+    print(f"{games:,} games of {num_players} players in {elapsed:.2f}s ({games / elapsed:,.0f} games/s)")
+    for seat, (estimate, probability) in enumerate(zip(simulated["win_probability"], exact["win_probability"])):
+        print(f"  seat {seat}: win {estimate:.4%} simulated, {probability:.4%} exact")
+    print(f"  mean length: {simulated['mean_length']:.3f} rounds simulated, {exact['mean_length']:.3f} exact")
+    lengths = simulated["lengths"]
+    cumulative = 0
+    for rounds, count in lengths.items():
+        cumulative += count
+        if cumulative >= games / 2:
+            print(f"  median length: {rounds} rounds, longest: {max(lengths)} rounds")
+            break
+
+
+def compare_engines(games: int, num_players: int = 2):
+    """ Games per second for Game objects, the jump-table loop and, if available, NumPy. """
+    board = default_board()
+    colors = list(Color)[:num_players]
+
+    def objects():
+        die = Die()
+        for _ in range(games):
+            Game(board, die, [Player(color) for color in colors], verbose=False).start()
+
+    engines = [("Game objects", objects), ("jump table", lambda: simulate(board, num_players, games, workers=0))]
+    if np is not None:
+        engines.append(("numpy", lambda: simulate_vectorized(board, num_players, games)))
+    baseline = None
+    for label, run in engines:
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{label:<13} {games / elapsed:>12,.0f} games/s {baseline / elapsed:>7.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snake and Ladder.")
+    parser.add_argument("--simulate", type=int, metavar="N", help="play N headless games and compare with the exact odds")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--workers", type=int, help="worker processes for --simulate, 0 to stay in this process")
+    parser.add_argument("--vectorized", action="store_true", help="run --simulate with NumPy instead of a process pool")
+    parser.add_argument("--compare", type=int, metavar="N", help="time N games with each simulation engine")
+    args = parser.parse_args(argv)
+    if args.simulate:
+        analyse(args.simulate, args.players, args.workers, args.vectorized)
+        return
+    if args.compare:
+        compare_engines(args.compare, args.players)
+        return
+
     player1 = Player(Color.Red)
     player2 = Player(Color.Blue)
     players = [player1, player2]
     die = Die()
-    snakes = [Snake(s, e) for s, e in zip([34, 40, 56, 78, 90], [12, 23, 17, 42, 8])]
-    ladders = [Ladder(s, e) for s, e in zip([3, 13, 55, 75, 66], [45, 33, 99, 81, 88])]
-    board = Board(snakes, ladders)
+    board = default_board()
     game = Game(board, die, players)
     game.start()
     print(game.get_winner())
@@ -40,4 +40,386 @@ Should produce the following output (format: ):
 
 Input needs to be read from a text file, and output should be printed to console. Your program should execute and take the location to the test file as parameter.
 
-"""
\ No newline at end of file
+"""
+import argparse
+import collections
+import heapq
+import multiprocessing
+import queue
+import random
+import sys
+import time
+import traceback
+import zlib
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+
+class Side(Enum):
+    Buy = "buy"
+    Sell = "sell"
+
+
+class Order:
+    __slots__ = ("id", "time", "symbol", "side", "price", "quantity", "seq")
+
+    def __init__(self, id_: str, time_: str, symbol: str, side: Side, price: int, quantity: int, seq: int = 0):
+        self.id = id_
+        self.time = time_
+        self.symbol = symbol
+        self.side = side
+        self.price = price  # in cents, to keep price comparisons exact
+        self.quantity = quantity
+        self.seq = seq
+
+    def __str__(self):
+        return f"{self.id} {self.time} {self.symbol} {self.side.value} {format_price(self.price)} {self.quantity}"
+
+
+class Trade:
+    __slots__ = ("buy_id", "price", "quantity", "sell_id", "seq")
+
+    def __init__(self, buy_id: str, price: int, quantity: int, sell_id: str, seq: int = 0):
+        self.buy_id = buy_id
+        self.price = price
+        self.quantity = quantity
+        self.sell_id = sell_id
+        self.seq = seq  # sequence number of the incoming order that caused the trade
+
+    def __str__(self):
+        return f"{self.buy_id} {format_price(self.price)} {self.quantity} {self.sell_id}"
+
+
+def parse_price(text: str) -> int:
+    units, _, cents = text.partition(".")
+    return int(units) * 100 + int((cents + "00")[:2])
+
+
+def format_price(price: int) -> str:
+    return f"{price // 100}.{price % 100:02d}"
+
+
+class OrderBook:
+    """
+    Order book of a single symbol.
+
+    Each side keeps `price -> deque of resting orders` (FIFO within the level)
+    and a heap of the prices present, max-heap (negated) for bids and min-heap
+    for asks, so the best level is always at index 0.
+
+    Cancelling only zeroes the order's quantity and forgets its id, which is
+    O(1). Cancelled orders are skipped and dropped when matching reaches them,
+    and levels that turn out empty are popped from the heap the same way.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: Dict[int, collections.deque] = {}
+        self.asks: Dict[int, collections.deque] = {}
+        self.bid_prices: List[int] = []
+        self.ask_prices: List[int] = []
+        self.orders: Dict[str, Order] = {}
+
+    def add(self, order: Order) -> List[Trade]:
+        if order.side is Side.Buy:
+            trades = self._match_buy(order)
+            if order.quantity:
+                self._rest(order, self.bids, self.bid_prices, -order.price)
+        else:
+            trades = self._match_sell(order)
+            if order.quantity:
+                self._rest(order, self.asks, self.ask_prices, order.price)
+        return trades
+
+    def cancel(self, order_id: str) -> bool:
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return False
+        order.quantity = 0
+        return True
+
+    def _rest(self, order: Order, levels, prices, heap_key):
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = collections.deque()
+            heapq.heappush(prices, heap_key)
+        level.append(order)
+        self.orders[order.id] = order
+
+    def _match_buy(self, buy: Order) -> List[Trade]:
+        trades = []
+        asks, prices, orders = self.asks, self.ask_prices, self.orders
+        while buy.quantity and prices and prices[0] <= buy.price:
+            price = prices[0]
+            level = asks[price]
+            while buy.quantity and level:
+                sell = level[0]
+                quantity = min(buy.quantity, sell.quantity)
+                if quantity:
+                    trades.append(Trade(buy.id, price, quantity, sell.id, buy.seq))
+                    buy.quantity -= quantity
+                    sell.quantity -= quantity
+                if not sell.quantity:
+                    level.popleft()
+                    orders.pop(sell.id, None)
+            if not level:
+                del asks[price]
+                heapq.heappop(prices)
+        return trades
+
+    def _match_sell(self, sell: Order) -> List[Trade]:
+        trades = []
+        bids, prices, orders = self.bids, self.bid_prices, self.orders
+        while sell.quantity and prices and -prices[0] >= sell.price:
+            level = bids[-prices[0]]
+            while sell.quantity and level:
+                buy = level[0]
+                quantity = min(buy.quantity, sell.quantity)
+                if quantity:
+                    # Trades always execute at the sell order's price.
+                    trades.append(Trade(buy.id, sell.price, quantity, sell.id, sell.seq))
+                    buy.quantity -= quantity
+                    sell.quantity -= quantity
+                if not buy.quantity:
+                    level.popleft()
+                    orders.pop(buy.id, None)
+            if not level:
+                del bids[-prices[0]]
+                heapq.heappop(prices)
+        return trades
+
+    def best_bid(self) -> Optional[int]:
+        self._drop_cancelled(self.bids, self.bid_prices, -1)
+        return -self.bid_prices[0] if self.bid_prices else None
+
+    def best_ask(self) -> Optional[int]:
+        self._drop_cancelled(self.asks, self.ask_prices, 1)
+        return self.ask_prices[0] if self.ask_prices else None
+
+    @staticmethod
+    def _drop_cancelled(levels, prices, sign):
+        while prices:
+            level = levels[sign * prices[0]]
+            while level and not level[0].quantity:
+                level.popleft()
+            if level:
+                return
+            del levels[sign * prices[0]]
+            heapq.heappop(prices)
+
+
+class Exchange:
+
+    def __init__(self):
+        self.books: Dict[str, OrderBook] = {}
+
+    def book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def place(self, order: Order) -> List[Trade]:
+        return self.book(order.symbol).add(order)
+
+    def cancel(self, symbol: str, order_id: str) -> bool:
+        book = self.books.get(symbol)
+        return book.cancel(order_id) if book else False
+
+    def run(self, orders: Iterable[Order]) -> Iterator[Trade]:
+        for order in orders:
+            yield from self.place(order)
+
+
+def parse_order(line: str, seq: int = 0) -> Optional[Order]:
+    """ Parses `#1 09:45 BAC sell 240.12 100`, returns None for blank lines. """
+    parts = line.split()
+    if not parts:
+        return None
+    id_, time_, symbol, side, price, quantity = parts
+    return Order(id_, time_, symbol, Side(side.lower()), parse_price(price), int(quantity), seq)
+
+
+def read_orders(f: TextIO) -> Iterator[Order]:
+    """ Lazily parses orders from an open file, one per non-blank line. """
+    seq = 0
+    for line in f:
+        order = parse_order(line, seq)
+        if order is not None:
+            yield order
+            seq += 1
+
+
+def _match_worker(inbox, outbox):
+    """
+    Worker process owning the books of a fixed subset of symbols. Receives
+    batches of (seq, line) and answers every batch, even an empty one, with
+    the (seq, trade) pairs it produced, in input order. If matching raises,
+    the traceback is sent instead and the worker stops.
+    """
+    exchange = Exchange()
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        try:
+            trades = []
+            for seq, line in batch:
+                for trade in exchange.place(parse_order(line, seq)):
+                    trades.append((trade.seq, str(trade)))
+        except Exception:
+            outbox.put((False, traceback.format_exc()))
+            break
+        outbox.put((True, trades))
+
+
+class ParallelExchange:
+    """
+    Matches orders of different symbols in separate processes.
+
+    Symbols are independent, so every symbol is pinned to one worker (by a
+    stable hash of its name) and that worker owns its order book. The input is
+    split into batches of `batch_size` lines; each worker gets its share of
+    every batch and the trades of a batch are merged back by input sequence
+    number, so the output is identical to the single-process Exchange.
+    """
+
+    def __init__(self, workers: int = None, batch_size: int = 10000):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.batch_size = batch_size
+        self._assignment: Dict[str, int] = {}
+
+    def _worker_of(self, symbol: str) -> int:
+        worker = self._assignment.get(symbol)
+        if worker is None:
+            worker = self._assignment[symbol] = zlib.crc32(symbol.encode()) % self.workers
+        return worker
+
+    def _batches(self, lines: Iterable[str]) -> Iterator[List[list]]:
+        batch = [[] for _ in range(self.workers)]
+        size = seq = 0
+        for line in lines:
+            parts = line.split(None, 3)
+            if not parts:
+                continue
+            batch[self._worker_of(parts[2])].append((seq, line))
+            seq += 1
+            size += 1
+            if size == self.batch_size:
+                yield batch
+                batch = [[] for _ in range(self.workers)]
+                size = 0
+        if size:
+            yield batch
+
+    def run(self, lines: Iterable[str]) -> Iterator[str]:
+        inboxes = [multiprocessing.Queue() for _ in range(self.workers)]
+        outboxes = [multiprocessing.Queue() for _ in range(self.workers)]
+        processes = [multiprocessing.Process(target=_match_worker, args=(inbox, outbox), daemon=True)
+                     for inbox, outbox in zip(inboxes, outboxes)]
+        for process in processes:
+            process.start()
+        try:
+            in_flight = 0
+            for batch in self._batches(lines):
+                for inbox, part in zip(inboxes, batch):
+                    inbox.put(part)
+                in_flight += 1
+                # Keep one batch queued ahead so workers never wait on the parser.
+                if in_flight == 2:
+                    yield from self._collect(outboxes, processes)
+                    in_flight -= 1
+            while in_flight:
+                yield from self._collect(outboxes, processes)
+                in_flight -= 1
+        finally:
+            for inbox in inboxes:
+                inbox.put(None)
+            for process in processes:
+                # Workers still busy (the caller stopped early or another worker failed) are not waited for.
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    @staticmethod
+    def _collect(outboxes, processes) -> Iterator[str]:
+        results = []
+        for outbox, process in zip(outboxes, processes):
+            while True:
+                try:
+                    ok, payload = outbox.get(timeout=1)
+                    break
+                except queue.Empty:
+                    # Workers only exit on the stop sentinel, so a dead one was killed (OOM, signal).
+                    if not process.is_alive():
+                        raise RuntimeError(f"matching worker {process.pid} died with exit code {process.exitcode}")
+            if not ok:
+                raise RuntimeError(f"matching worker {process.pid} failed:\n{payload}")
+            results.append(payload)
+        for _, trade in heapq.merge(*results, key=lambda item: item[0]):
+            yield trade
+
+
+def generate_orders(n: int, symbols: List[str] = None, seed: int = 0) -> Iterator[str]:
+    """ Synthetic order stream around a slowly drifting mid price per symbol. """
+    rng = random.Random(seed)
+    symbols = symbols or ["BAC"]
+    mids = {symbol: 10000 for symbol in symbols}
+    for i in range(1, n + 1):
+        symbol = rng.choice(symbols)
+        mid = mids[symbol] = max(100, mids[symbol] + rng.randint(-2, 2))
+        side = "buy" if rng.random() < 0.5 else "sell"
+        price = mid + rng.randint(-20, 20)
+        minute = i // 1000
+        yield f"#{i} {9 + minute // 60 % 24:02d}:{minute % 60:02d} {symbol} {side} {format_price(price)} {rng.randint(1, 200)}"
+
+
+def benchmark(n: int, symbols: List[str] = None):
+    lines = list(generate_orders(n, symbols))
+    orders = [parse_order(line, seq) for seq, line in enumerate(lines)]
+    exchange = Exchange()
+    started = time.perf_counter()
+    trades = 0
+    for order in orders:
+        trades += len(exchange.place(order))
+    elapsed = time.perf_counter() - started
+    print(f"{n:,} orders, {trades:,} trades in {elapsed:.2f}s: {n / elapsed:,.0f} orders/s")
+
+
+def benchmark_parallel(n: int, workers: int, symbols: int = 64):
+    lines = list(generate_orders(n, [f"S{i:03d}" for i in range(symbols)]))
+    for count in sorted({1, workers}):
+        started = time.perf_counter()
+        trades = sum(1 for _ in ParallelExchange(count).run(lines))
+        elapsed = time.perf_counter() - started
+        print(f"{count} worker(s): {n:,} orders, {trades:,} trades in {elapsed:.2f}s: {n / elapsed:,.0f} orders/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match buy and sell orders read from a file.")
+    parser.add_argument("path", nargs="?", help="order file, one order per line")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="match N synthetic orders and report throughput")
+    parser.add_argument("--workers", type=int, help="match symbols in this many worker processes")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        if args.workers:
+            benchmark_parallel(args.benchmark, args.workers)
+        else:
+            benchmark(args.benchmark)
+        return
+    if not args.path:
+        parser.error("path to the order file is required")
+
+    out = sys.stdout
+    with open(args.path) as f:
+        if args.workers:
+            for trade in ParallelExchange(args.workers).run(f):
+                out.write(f"{trade}\n")
+        else:
+            for trade in Exchange().run(read_orders(f)):
+                out.write(f"{trade}\n")
+
+
+if __name__ == "__main__":
+    main()
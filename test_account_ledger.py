@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from account_ledger import Ledger
+
+
+class TestLedger(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ledgers = []
+
+    def tearDown(self):
+        for ledger in self.ledgers:
+            ledger.close()
+        self.directory.cleanup()
+
+    def ledger(self, amounts):
+        ledger = Ledger()
+        for i, amount in enumerate(amounts):
+            ledger.append(amount, 0, timestamp=float(i))
+        self.ledgers.append(ledger)
+        return ledger
+
+    def test_archive_keeps_history(self):
+        ledger = self.ledger([1.0] * 10)
+        ledger.archive(self.directory.name)
+        ledger.append(5.0, 1, timestamp=20.0)
+        self.assertEqual(len(ledger), 11)
+        self.assertEqual(ledger.balance_at(9.0), 10.0)
+        self.assertEqual(ledger.balance_at(20.0), 15.0)
+        self.assertEqual(list(ledger.between(19.0, 21.0)), [(20.0, 5.0, 1)])
+
+    def test_accounts_archive_into_one_directory(self):
+        # Both ledgers' first segment starts at entry 0
+        first = self.ledger([1.0] * 10)
+        first.archive(self.directory.name)
+        second = self.ledger([-2.0] * 3)
+        second.archive(self.directory.name)
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
+        self.assertEqual(first.balance_at(100.0), 10.0)
+        self.assertEqual(list(first.entries()), [(float(i), 1.0, 0) for i in range(10)])
+        self.assertEqual(second.balance_at(100.0), -6.0)
+        self.assertEqual(list(second.entries()), [(float(i), -2.0, 0) for i in range(3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
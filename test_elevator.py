@@ -1,7 +1,7 @@
 import threading
-import time
 import unittest
-from elevator_syatem import Elevator, State, Direction, Request, RequestType
+from elevator_syatem import Elevator, ElevatorBank, State, Direction, Request, RequestType
+from elevator_simulation import Simulation, traffic
 
 
 class TestElevator(unittest.TestCase):
@@ -42,15 +42,59 @@ class TestElevator(unittest.TestCase):
         self.assertEqual(self.elevator.state, State.Unavailable)
 
     def test_full_scenario(self):
-        # Test a complete scenario
-        self.elevator.send_request(Request(src=2, type_=RequestType.External, direction=Direction.Up))
-        self.elevator.send_request(Request(src=4, type_=RequestType.Internal, dest=8))
-        t = threading.Thread(target=self.elevator.dispatch)
+        # Test a complete scenario, with no travel or door time so nothing sleeps
+        elevator = Elevator(state=State.Idle, floor=0, num_floors=self.num_floors,
+                            floor_time=0, door_time=0, verbose=False)
+        elevator.send_request(Request(src=2, type_=RequestType.External, direction=Direction.Up))
+        elevator.send_request(Request(src=4, type_=RequestType.Internal, dest=8))
+        t = threading.Thread(target=elevator.dispatch)
         t.start()
+        # Going idle notifies the dispatch condition, so wait on it instead of the clock
+        with elevator._wakeup:
+            done = elevator._wakeup.wait_for(lambda: elevator.state == State.Idle and not elevator.pending,
+                                             timeout=5)
         # Stop the thread/elevator
-        time.sleep(5)
-        self.elevator.state = State.Unavailable
-        self.assertEqual(self.elevator.floor, 8)
+        elevator.state = State.Unavailable
+        t.join(timeout=5)
+        self.assertTrue(done)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(elevator.floor, 8)
+
+    def test_requests_while_cars_run(self):
+        # Dispatching reads each car's boarding list while its thread pops from it
+        bank = ElevatorBank(2, 60, floor_time=0, door_time=0)
+        bank.start()
+        try:
+            for i in range(3000):
+                src, dest = (i * 7) % 60, (i * 13 + 1) % 60
+                if src != dest:
+                    bank.request(src, dest)
+        finally:
+            bank.shutdown()
+
+
+class TestSimulation(unittest.TestCase):
+    def test_single_passenger_timing(self):
+        # Car waits at floor 0, passenger calls from floor 5 going down to 0
+        sim = Simulation(num_floors=10, num_cars=1, floor_time=1.5, door_time=8.0)
+        result = sim.run([(0.0, Request(src=5, type_=RequestType.External, dest=0, direction=Direction.Down))])
+        self.assertEqual(result["passengers"], 1)
+        self.assertAlmostEqual(result["avg_wait"], 7.5)
+        self.assertAlmostEqual(result["avg_journey"], 7.5 + 8.0 + 7.5)
+
+    def test_everyone_is_delivered(self):
+        for pattern in ("up-peak", "down-peak", "inter-floor"):
+            sim = Simulation(num_floors=20, num_cars=3, capacity=4)
+            result = sim.run(traffic(pattern, 20, 2000, rate=0.2, seed=1))
+            self.assertEqual(result["passengers"], 2000)
+            self.assertTrue(all(car.load == 0 and not car.waiting for car in sim.cars))
+
+    def test_look_beats_round_robin_at_up_peak(self):
+        waits = {}
+        for policy in ("look", "round-robin"):
+            sim = Simulation(num_floors=30, num_cars=4, policy=policy)
+            waits[policy] = sim.run(traffic("up-peak", 30, 3000, rate=0.2))["avg_wait"]
+        self.assertLess(waits["look"], waits["round-robin"])
 
 
 if __name__ == "__main__":
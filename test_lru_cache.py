@@ -0,0 +1,77 @@
+import threading
+import unittest
+from lru_cache import ShardedLRUCache
+
+
+class TestShardedLRUCache(unittest.TestCase):
+    def test_capacity_is_global(self):
+        cache = ShardedLRUCache(100)
+        for i in range(1000):
+            cache.put(i, i)
+            self.assertLessEqual(len(cache), 100)
+        self.assertEqual(len(cache), 100)
+        # The most recent entries survive
+        self.assertEqual(cache.get(999), 999)
+
+    def test_value_larger_than_a_shard_share_fits(self):
+        cache = ShardedLRUCache(100, max_bytes=10000, weigher=len)
+        cache.put("big", b"x" * 749)
+        self.assertEqual(cache.get("big"), b"x" * 749)
+        cache.put("huge", b"x" * 9000)
+        self.assertEqual(cache.get("huge"), b"x" * 9000)
+        self.assertLessEqual(cache.total_bytes, 10000)
+
+    def test_max_bytes_below_shard_count(self):
+        cache = ShardedLRUCache(100, num_shards=16, max_bytes=10, weigher=len)
+        cache.put(1, b"abcd")
+        cache.put(2, b"efgh")
+        self.assertEqual(cache.get(1), b"abcd")
+        self.assertEqual(cache.total_bytes, 8)
+        cache.put(3, b"ijkl")
+        self.assertEqual(cache.get(1), -1)
+        self.assertEqual(cache.total_bytes, 8)
+
+    def test_value_heavier_than_max_bytes_is_rejected(self):
+        cache = ShardedLRUCache(10, max_bytes=10, weigher=len)
+        cache.put(1, b"x" * 11)
+        self.assertEqual(cache.get(1), -1)
+        self.assertEqual(len(cache), 0)
+
+    def test_byte_limit_under_concurrent_puts(self):
+        cache = ShardedLRUCache(10000, max_bytes=5000, weigher=len)
+
+        def worker(offset):
+            for i in range(2000):
+                cache.put(offset + i, b"x" * (i % 50 + 1))
+
+        threads = [threading.Thread(target=worker, args=(n * 10000,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(cache.total_bytes, 5000)
+        self.assertEqual(cache.total_bytes, sum(shard.bytes for shard in cache.shards))
+        self.assertEqual(len(cache), sum(len(shard.cache) for shard in cache.shards))
+
+    def test_expired_entries_are_evicted_before_live_ones(self):
+        now = [0.0]
+        cache = ShardedLRUCache(2, num_shards=1, clock=lambda: now[0])
+        cache.put("live", 1)
+        cache.put("short", 2, ttl=1)
+        now[0] = 5.0
+        # "live" is the least recently used, but "short" has expired
+        cache.put("new", 3)
+        self.assertEqual(cache.get("live"), 1)
+        self.assertEqual(cache.get("new"), 3)
+        self.assertEqual(cache.get("short"), -1)
+        self.assertEqual(len(cache), 2)
+
+    def test_expiry_heap_stays_bounded(self):
+        cache = ShardedLRUCache(10, num_shards=1, default_ttl=60)
+        for i in range(10000):
+            cache.put(i % 5, i)
+        self.assertLessEqual(len(cache.shards[0].expiries), 2 * 5 + 16 + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import contextlib
+import io
+import unittest
+from parking_lot import ParkingLot, ParkingSlot, Vehicle, VehicleType
+
+
+class TestParkingLot(unittest.TestCase):
+    def setUp(self):
+        # One level with a single four-wheeler slot
+        self.parking_lot = ParkingLot(1)
+        self.slot = ParkingSlot(VehicleType.FourWheeler)
+        self.parking_lot.add_parking_slot(0, self.slot)
+
+    def unpark(self, ticket):
+        # Fare receipts are printed on unpark
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.parking_lot.unpark_vehicle(ticket)
+
+    def test_park_and_unpark(self):
+        ticket = self.parking_lot.park_vehicle(Vehicle("KA-01", VehicleType.FourWheeler))
+        self.assertEqual(ticket.slot_number, self.slot.slot_number)
+        self.assertEqual(self.parking_lot.available_slots(), 0)
+        self.unpark(ticket)
+        self.assertEqual(self.parking_lot.available_slots(), 1)
+
+    def test_stale_ticket_cannot_unpark_next_occupant(self):
+        first = Vehicle("KA-01", VehicleType.FourWheeler)
+        second = Vehicle("KA-02", VehicleType.FourWheeler)
+        old_ticket = self.parking_lot.park_vehicle(first)
+        self.unpark(old_ticket)
+        self.parking_lot.park_vehicle(second)
+        with self.assertRaises(Exception):
+            self.unpark(old_ticket)
+        self.assertIs(self.slot.vehicle, second)
+        self.assertEqual(self.parking_lot.available_slots(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
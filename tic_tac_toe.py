@@ -1,42 +1,92 @@
-class Board:
+import argparse
+import random
+import time
+from array import array
+from typing import List, Optional, Tuple
+
+# Row, column, diagonal and anti-diagonal steps
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
 
-    def __init__(self):
-        self.grid = [[" "] * 3 for _ in range(3)]
+
+class Board:
+    """
+    N x N board where K marks in a row win (3 x 3, 3 in a row by default).
+
+    Besides the grid, the board keeps for every direction the length of
+    each run of equal marks, stored on the run's two end cells. A new mark
+    only ever touches the ends of the runs next to it, so a move updates
+    the win state in O(1) whatever the board size, and check_winner and
+    is_full are lookups instead of scans.
+    """
+
+    def __init__(self, size: int = 3, win_length: Optional[int] = None):
+        self.size = size
+        self.win_length = win_length or size
+        if not 1 <= self.win_length <= size:
+            raise ValueError("win length must be between 1 and the board size")
+        self.grid = [[" "] * size for _ in range(size)]
+        self.empty = size * size
+        self.winner: Optional[str] = None
+        self._runs = [array("i", [0]) * (size * size) for _ in DIRECTIONS]
+        # Per move: (x, y, winner before it, run lengths on each side per direction), for undo_move.
+        self.history: List[Tuple[int, int, Optional[str], Tuple[Tuple[int, int], ...]]] = []
 
     def display(self):
         for i, row in enumerate(self.grid):
             print(" | ".join(row))
-            if i < 2:
-                print("- " * 5)
+            if i < self.size - 1:
+                print("- " * (2 * self.size - 1))
+
+    def _run(self, x: int, y: int, mark: str, runs: array) -> int:
+        """ Length of the run of `mark` ending at (x, y), 0 if that cell is off the board or not `mark`. """
+        if 0 <= x < self.size and 0 <= y < self.size and self.grid[x][y] == mark:
+            return runs[x * self.size + y]
+        return 0
 
     def make_move(self, x, y, mark):
-        if self.grid[x][y] == " ":
-            self.grid[x][y] = mark
-            return True
-        return False
+        if not (0 <= x < self.size and 0 <= y < self.size) or self.grid[x][y] != " ":
+            return False
+        self.grid[x][y] = mark
+        self.empty -= 1
+        n = self.size
+        sides = []
+        winner = self.winner
+        for (dx, dy), runs in zip(DIRECTIONS, self._runs):
+            before = self._run(x - dx, y - dy, mark, runs)
+            after = self._run(x + dx, y + dy, mark, runs)
+            length = before + 1 + after
+            runs[(x - dx * before) * n + y - dy * before] = length
+            runs[(x + dx * after) * n + y + dy * after] = length
+            if length >= self.win_length and self.winner is None:
+                self.winner = mark
+            sides.append((before, after))
+        self.history.append((x, y, winner, tuple(sides)))
+        return True
+
+    def undo_move(self) -> Optional[Tuple[int, int]]:
+        """ Takes back the last move in O(1), e.g. for game-tree search. """
+        if not self.history:
+            return None
+        x, y, winner, sides = self.history.pop()
+        n = self.size
+        for (dx, dy), runs, (before, after) in zip(DIRECTIONS, self._runs, sides):
+            # The run through (x, y) splits back into the parts on either side.
+            if before:
+                runs[(x - dx * before) * n + y - dy * before] = before
+                runs[(x - dx) * n + y - dy] = before
+            if after:
+                runs[(x + dx) * n + y + dy] = after
+                runs[(x + dx * after) * n + y + dy * after] = after
+        self.grid[x][y] = " "
+        self.empty += 1
+        self.winner = winner
+        return x, y
 
     def is_full(self):
-        for row in self.grid:
-            if " " in row:
-                return False
-        return True
+        return self.empty == 0
 
     def check_winner(self, mark):
-        # Check rows
-        for row in self.grid:
-            if all(cell == mark for cell in row):
-                return True
-        # Check columns
-        for col in range(3):
-            if all(self.grid[row][col] == mark for row in range(3)):
-                return True
-        # Check top-left to bottom-right diagonal
-        if all(self.grid[i][i] == mark for i in range(3)):
-            return True
-        # Check the bottom-left to top-right diagonal
-        if all(self.grid[i][3-i-1] == mark for i in range(3)):
-            return True
-        return False
+        return self.winner == mark
 
 
 class Player:
@@ -51,8 +101,8 @@ class Player:
 
 class Game:
 
-    def __init__(self, players):
-        self.board = Board()
+    def __init__(self, players, size: int = 3, win_length: Optional[int] = None):
+        self.board = Board(size, win_length)
         self.players = players[:2]
         self.current_turn = 0
 
@@ -83,10 +133,42 @@ class Game:
                 print("Invalid move, try again!")
 
 
-def main():
+def self_play(size: int, win_length: int, games: int, seed: int = 0):
+    """ Random self-play: moves per second and how games end. """
+    rng = random.Random(seed)
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    results = {"X": 0, "0": 0, "draw": 0}
+    moves = 0
+    started = time.perf_counter()
+    for _ in range(games):
+        board = Board(size, win_length)
+        rng.shuffle(cells)
+        mark = "X"
+        for x, y in cells:
+            board.make_move(x, y, mark)
+            moves += 1
+            if board.winner or board.is_full():
+                break
+            mark = "0" if mark == "X" else "X"
+        results[board.winner or "draw"] += 1
+    elapsed = time.perf_counter() - started
+    print(f"{games:,} random games on {size}x{size}, {win_length} in a row: "
+          f"{moves / elapsed:,.0f} moves/s, X {results['X']:,} / 0 {results['0']:,} / draw {results['draw']:,}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tic Tac Toe on an N x N board, K in a row.")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win-length", type=int, help="marks in a row to win, defaults to the board size")
+    parser.add_argument("--self-play", type=int, metavar="N", help="play N random games and report move rate")
+    args = parser.parse_args(argv)
+    if args.self_play:
+        self_play(args.size, args.win_length or args.size, args.self_play)
+        return
+
     player1 = Player("Mark")
     player2 = Player("John")
-    game = Game([player1, player2])
+    game = Game([player1, player2], args.size, args.win_length)
     game.play()
 
 
@@ -0,0 +1,154 @@
+"""
+W-TinyLFU cache.
+
+LFUCache counts frequency forever, so keys that were hot an hour ago keep
+their slots after the traffic has moved on. W-TinyLFU keeps frequency as a
+decaying estimate instead and uses it only to decide admission:
+
+1. A small LRU admission window (1% of capacity by default) takes every new
+   key, so bursts of new keys get a chance to build up frequency.
+
+2. Keys evicted from the window compete with the LRU victim of the main region;
+   the one with the higher estimated frequency stays. Frequency comes from a
+   count-min sketch whose counters are halved every `sample_size` increments,
+   so old popularity fades.
+
+3. The main region is a segmented LRU: new admissions land in probation, a
+   second hit promotes them to protected (80% of the main region).
+"""
+import collections
+import random
+from array import array
+
+_HALVED = bytes(i >> 1 for i in range(256))
+
+
+class CountMinSketch:
+    """
+    Frequency estimator with `depth` rows of `width` small counters. Each
+    counter saturates at 15 (the classic 4-bit TinyLFU counter) and all of
+    them are halved once `sample_size` increments have been recorded.
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, width: int, depth: int = 4, sample_size: int = None):
+        self.width = 1 << max(width - 1, 1).bit_length()  # next power of two
+        self.mask = self.width - 1
+        self.depth = depth
+        self.rows = [array("B", bytes(self.width)) for _ in range(depth)]
+        self.seeds = [random.Random(row).getrandbits(61) | 1 for row in range(depth)]
+        self.sample_size = sample_size or 10 * self.width
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        mask = self.mask
+        return [((h * seed) >> 17) & mask for seed in self.seeds]
+
+    def increment(self, key) -> None:
+        added = False
+        for row, index in zip(self.rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+                added = True
+        if added:
+            self.additions += 1
+            if self.additions >= self.sample_size:
+                self.reset()
+
+    def estimate(self, key) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def reset(self) -> None:
+        self.rows = [array("B", row.tobytes().translate(_HALVED)) for row in self.rows]
+        self.additions //= 2
+
+
+class WTinyLFUCache:
+
+    def __init__(self, capacity: int, window_ratio: float = 0.01, protected_ratio: float = 0.8):
+        self.capacity = capacity
+        self.window_capacity = max(1, int(capacity * window_ratio)) if capacity > 1 else capacity
+        main_capacity = capacity - self.window_capacity
+        self.protected_capacity = int(main_capacity * protected_ratio)
+        self.main_capacity = main_capacity
+
+        self.window = collections.OrderedDict()
+        self.probation = collections.OrderedDict()
+        self.protected = collections.OrderedDict()
+        self.sketch = CountMinSketch(max(capacity, 16))
+
+    def __len__(self):
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+    def _touch(self, key):
+        """ Move a resident key one step up; returns False if the key is absent. """
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+        elif key in self.probation:
+            self.protected[key] = self.probation.pop(key)
+            if len(self.protected) > self.protected_capacity:
+                demoted, value = self.protected.popitem(last=False)
+                self.probation[demoted] = value
+        else:
+            return False
+        return True
+
+    def _segment(self, key):
+        for segment in (self.window, self.protected, self.probation):
+            if key in segment:
+                return segment
+
+    def get(self, key: int) -> int:
+        self.sketch.increment(key)
+        if not self._touch(key):
+            return -1
+        return self._segment(key)[key]
+
+    def put(self, key: int, value: int) -> None:
+        if self.capacity <= 0:
+            return
+        self.sketch.increment(key)
+        if self._touch(key):
+            self._segment(key)[key] = value
+            return
+
+        self.window[key] = value
+        if len(self.window) <= self.window_capacity:
+            return
+        candidate, candidate_value = self.window.popitem(last=False)
+        if self.main_capacity == 0:
+            return
+        if len(self.probation) + len(self.protected) < self.main_capacity:
+            self.probation[candidate] = candidate_value
+            return
+        if not self.probation:
+            # Everything in main is protected, challenge its LRU entry instead.
+            victim_segment = self.protected
+        else:
+            victim_segment = self.probation
+        victim = next(iter(victim_segment))
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            del victim_segment[victim]
+            self.probation[candidate] = candidate_value
+
+
+def main():
+    from cache_benchmark import hit_ratio, zipf_trace
+    from lfu_cache import LFUCache
+    from lru_cache import LRUCache
+
+    # Two Zipf phases over disjoint key ranges: the popular keys of phase one
+    # go completely cold in phase two.
+    trace = zipf_trace(10000, 200000, seed=1) + zipf_trace(10000, 200000, offset=10000, seed=2)
+    print(f"{'capacity':>8} {'LRU':>8} {'LFU':>8} {'W-TinyLFU':>10}")
+    for capacity in (100, 500, 1000, 2000):
+        ratios = [hit_ratio(cls(capacity), trace) for cls in (LRUCache, LFUCache, WTinyLFUCache)]
+        print(f"{capacity:>8} " + " ".join(f"{ratio:>8.2%}" for ratio in ratios[:2]) + f" {ratios[2]:>10.2%}")
+
+
+if __name__ == "__main__":
+    main()
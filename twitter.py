@@ -1,11 +1,15 @@
-from typing import List
+import bisect
+import collections
+import heapq
+from typing import List, Optional, Tuple
 
 
 class Tweet:
 
-    def __init__(self, tweetId: int, timestamp: int):
+    def __init__(self, tweetId: int, timestamp: int, userId: Optional[int] = None):
         self.tweetId = tweetId
         self.timestamp = timestamp
+        self.userId = userId
 
     def __str__(self) -> str:
         return f"{self.tweetId}"
@@ -17,6 +21,11 @@ class User:
         self.userId = userId
         self.tweets = []
         self.following = set()
+        self.followers = set()
+        # Fan-out-on-write state, only used when Twitter.fanout_on_write is set.
+        self.timeline = None
+        self.celebrity = False
+        self.celebrities_followed = set()
 
     def add_tweet(self, tweetId: Tweet):
         self.tweets.append(tweetId)
@@ -35,38 +44,167 @@ class User:
 
 
 class Twitter:
+    """
+    By default the news feed is built on read from every followee's tweets.
+
+    With `fanout_on_write=True` every user keeps a bounded ring of the latest
+    `feed_size` feed tweets. `postTweet` pushes the tweet into the rings of all
+    followers, `follow` backfills the ring and `unfollow` prunes it, so reading
+    the feed only touches `feed_size` tweets.
+
+    Users with more than `celebrity_threshold` followers are not fanned out,
+    pushing to all of them would make a single post too expensive. Their
+    followers pull the latest tweets from them at read time instead.
+    """
 
-    def __init__(self):
+    def __init__(self, fanout_on_write: bool = False, feed_size: int = 10, celebrity_threshold: int = 10000):
         self.users = {}
         self.tweet_count = 0
+        self.fanout_on_write = fanout_on_write
+        self.feed_size = feed_size
+        self.celebrity_threshold = celebrity_threshold
 
-    def postTweet(self, userId: int, tweetId: int) -> None:
+    def _get_or_create_user(self, userId: int) -> User:
         user = self.users.get(userId)
         if not user:
             user = User(userId)
+            if self.fanout_on_write:
+                user.timeline = collections.deque(maxlen=self.feed_size)
             self.users[userId] = user
+        return user
+
+    def postTweet(self, userId: int, tweetId: int) -> None:
+        user = self._get_or_create_user(userId)
         self.tweet_count += 1
-        tweet = Tweet(tweetId, self.tweet_count)
+        tweet = Tweet(tweetId, self.tweet_count, userId)
         user.add_tweet(tweet)
-
-    def getNewsFeed(self, userId: int) -> List[int]:
+        if self.fanout_on_write:
+            self._fan_out(user, tweet)
+
+    def _fan_out(self, user: User, tweet: Tweet):
+        user.timeline.append(tweet)
+        if len(user.followers) > self.celebrity_threshold:
+            if not user.celebrity:
+                user.celebrity = True
+                for followerId in user.followers:
+                    self.users[followerId].celebrities_followed.add(user.userId)
+            return
+        for followerId in user.followers:
+            self.users[followerId].timeline.append(tweet)
+
+    def getNewsFeed(self, userId: int, k: int = 10, before_timestamp: Optional[int] = None) -> List[int]:
+        """
+        The `k` most recent tweets from the user and their followees, newest first.
+        Pass `before_timestamp` to only get tweets older than that timestamp.
+        """
         user = self.users.get(userId)
         if user:
-            all_tweets = user.tweets.copy()
-            for followeeId in user.following:
-                followee = self.users.get(followeeId)
-                if followee:
-                    all_tweets.extend(followee.tweets)
-            return [tweet.tweetId for tweet in list(sorted(all_tweets, key=lambda x: x.timestamp, reverse=True))[:10]]
+            if self.fanout_on_write and k <= self.feed_size and before_timestamp is None:
+                return [tweet.tweetId for tweet in self._read_timeline(user)][:k]
+            return [tweet.tweetId for tweet in self._merge_feed(self._feed_sources(user), k, before_timestamp)]
+
+    def getNewsFeedPage(self, userId: int, k: int = 10,
+                        before_timestamp: Optional[int] = None) -> Tuple[List[int], Optional[int]]:
+        """
+        Same as getNewsFeed, but also returns the cursor for the next page:
+        pass it back as `before_timestamp`. The cursor is None on the last page.
+        """
+        user = self.users.get(userId)
+        if not user or k <= 0:
+            return [], None
+        feed = self._merge_feed(self._feed_sources(user), k, before_timestamp)
+        cursor = feed[-1].timestamp if len(feed) == k else None
+        return [tweet.tweetId for tweet in feed], cursor
+
+    def _feed_sources(self, user: User) -> List[User]:
+        sources = [user]
+        for followeeId in user.following:
+            followee = self.users.get(followeeId)
+            if followee:
+                sources.append(followee)
+        return sources
+
+    @staticmethod
+    def _merge_feed(sources: List[User], k: int, before_timestamp: Optional[int] = None) -> List[Tweet]:
+        """
+        k-way merge of the sources' tweet lists, walking each one backwards from
+        its newest tweet (or the first one before `before_timestamp`). Tweet lists
+        are already in timestamp order, so this stops after `k` pops:
+        O(F + k log F) for F sources, independent of how long the histories are.
+        """
+        heap = []
+        for source in sources:
+            tweets = source.tweets
+            if before_timestamp is None:
+                i = len(tweets)
+            else:
+                i = bisect.bisect_left(tweets, before_timestamp, key=lambda tweet: tweet.timestamp)
+            if i:
+                heap.append((-tweets[i - 1].timestamp, i - 1, tweets))
+        heapq.heapify(heap)
+
+        feed = []
+        while heap and len(feed) < k:
+            _, i, tweets = heap[0]
+            feed.append(tweets[i])
+            if i:
+                heapq.heapreplace(heap, (-tweets[i - 1].timestamp, i - 1, tweets))
+            else:
+                heapq.heappop(heap)
+        return feed
+
+    def _read_timeline(self, user: User) -> List[Tweet]:
+        if not user.celebrities_followed:
+            return list(reversed(user.timeline))
+        sources = [user.timeline]
+        for celebrityId in user.celebrities_followed:
+            sources.append(self.users[celebrityId].tweets[-self.feed_size:])
+        return self._latest(sources)
+
+    def _latest(self, sources) -> List[Tweet]:
+        """ The newest `feed_size` distinct tweets across timestamp-ordered sources. """
+        latest = {}
+        for source in sources:
+            for tweet in source:
+                latest[tweet.timestamp] = tweet
+        return heapq.nlargest(self.feed_size, latest.values(), key=lambda x: x.timestamp)
 
     def follow(self, followerId: int, followeeId: int) -> None:
-        user = self.users.get(followerId)
-        if not user:
-            user = User(followerId)
-            self.users[followerId] = user
+        user = self._get_or_create_user(followerId)
+        if not self.fanout_on_write:
+            user.follow(followeeId)
+            return
+        if followeeId == followerId or followeeId in user.following:
+            return
+        followee = self._get_or_create_user(followeeId)
         user.follow(followeeId)
+        followee.followers.add(followerId)
+        if followee.celebrity:
+            user.celebrities_followed.add(followeeId)
+        else:
+            latest = self._latest([user.timeline, followee.tweets[-self.feed_size:]])
+            user.timeline.clear()
+            user.timeline.extend(reversed(latest))
 
     def unfollow(self, followerId: int, followeeId: int) -> None:
         user = self.users.get(followerId)
         if user:
+            if not self.fanout_on_write:
+                user.unfollow(followeeId)
+                return
+            if followeeId not in user.following:
+                return
             user.unfollow(followeeId)
+            self.users[followeeId].followers.discard(followerId)
+            user.celebrities_followed.discard(followeeId)
+            if any(tweet.userId == followeeId for tweet in user.timeline):
+                self._rebuild_timeline(user)
+
+    def _rebuild_timeline(self, user: User):
+        sources = [user]
+        for followeeId in user.following:
+            followee = self.users[followeeId]
+            if not followee.celebrity:
+                sources.append(followee)
+        user.timeline.clear()
+        user.timeline.extend(reversed(self._merge_feed(sources, self.feed_size)))